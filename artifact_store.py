@@ -0,0 +1,230 @@
+# artifact_store.py
+"""
+SQLite persistence for the pipeline's output tables (standard library only).
+
+Each DataFrame becomes one table with an INTEGER PRIMARY KEY row id and
+secondary indexes on whichever lookup keys it has: (team_id,
+season_start_year), player_id, game_id, first_missed_game_id, event_id.
+Column dtypes are recorded so reads come back with the same types.
+
+    write_tables("nba.sqlite", {"team_metrics": team_metrics, ...})
+    read_table("nba.sqlite", "team_metrics",
+               where="team_id = ?", params=("BOS",))
+"""
+import sqlite3
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = [
+    ("team_id", "season_start_year"),
+    ("player_id",),
+    ("game_id",),
+    ("first_missed_game_id",),
+    ("event_id",),
+]
+
+META_TABLE = "_artifact_columns"
+
+# Rows per executemany / fetchmany call
+CHUNK_ROWS = 50000
+
+
+def _sql_type(dtype) -> str:
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype):
+        return "REAL"
+    return "TEXT"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sql_values(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert columns to types sqlite3 accepts (None for missing values)."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            s = s.dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif pd.api.types.is_bool_dtype(s):
+            # Int64 keeps missing values of nullable booleans
+            s = s.astype("Int64")
+        out[col] = s.astype(object).where(s.notna(), None)
+    return pd.DataFrame(out, index=df.index)
+
+
+def connect(db_path) -> sqlite3.Connection:
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode = WAL")
+    con.execute("PRAGMA synchronous = NORMAL")
+    return con
+
+
+def write_table(con: sqlite3.Connection, name: str, df: pd.DataFrame):
+    """
+    Replace table `name` with the contents of df in one transaction.
+
+    The drop, create, inserts, indexes and dtype rows commit together; if
+    anything fails the previous table and its metadata are left untouched.
+    """
+    cols = list(df.columns)
+    col_defs = ", ".join(
+        ["row_id INTEGER PRIMARY KEY"] + [f"{_quote(c)} {_sql_type(df[c].dtype)}" for c in cols]
+    )
+    if cols:
+        placeholders = ", ".join("?" for _ in cols)
+        insert = f"INSERT INTO {_quote(name)} ({', '.join(_quote(c) for c in cols)}) VALUES ({placeholders})"
+    else:
+        # A frame without columns (e.g. no departures found) keeps only its row count
+        insert = f"INSERT INTO {_quote(name)} DEFAULT VALUES"
+
+    # sqlite3 only opens a transaction implicitly before DML, so DROP/CREATE
+    # would commit on their own: manage the transaction explicitly instead
+    isolation_level = con.isolation_level
+    con.isolation_level = None
+    con.execute("BEGIN")
+    try:
+        con.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+        con.execute(f"CREATE TABLE {_quote(name)} ({col_defs})")
+
+        values = _to_sql_values(df)
+        for lo in range(0, len(values), CHUNK_ROWS):
+            chunk = values.iloc[lo:lo + CHUNK_ROWS]
+            rows = chunk.itertuples(index=False, name=None) if cols else [()] * len(chunk)
+            con.executemany(insert, rows)
+
+        # Build indexes after the bulk load: cheaper than maintaining them per row
+        for index_cols in INDEX_COLUMNS:
+            if set(index_cols) <= set(cols):
+                idx_name = f"idx_{name}_{'_'.join(index_cols)}"
+                con.execute(
+                    f"CREATE INDEX {_quote(idx_name)} ON {_quote(name)} "
+                    f"({', '.join(_quote(c) for c in index_cols)})"
+                )
+
+        con.execute(
+            f"CREATE TABLE IF NOT EXISTS {META_TABLE} "
+            "(table_name TEXT, column_name TEXT, dtype TEXT, position INTEGER)"
+        )
+        con.execute(f"DELETE FROM {META_TABLE} WHERE table_name = ?", (name,))
+        con.executemany(
+            f"INSERT INTO {META_TABLE} VALUES (?, ?, ?, ?)",
+            [(name, c, str(df[c].dtype), i) for i, c in enumerate(cols)],
+        )
+        con.execute("COMMIT")
+    except BaseException:
+        con.execute("ROLLBACK")
+        raise
+    finally:
+        con.isolation_level = isolation_level
+
+
+def write_tables(db_path, tables: dict):
+    """
+    Write {name: DataFrame} to the SQLite file at db_path (tables are replaced).
+    """
+    with closing(connect(db_path)) as con:
+        for name, df in tables.items():
+            write_table(con, name, df)
+        con.execute("ANALYZE")
+
+
+def _column_dtypes(con, name):
+    rows = con.execute(
+        f"SELECT column_name, dtype FROM {META_TABLE} WHERE table_name = ? ORDER BY position",
+        (name,),
+    ).fetchall()
+    # A column-less table has no metadata rows, so check the table itself
+    if not rows and not con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone():
+        raise KeyError(f"No table {name!r} in artifact store")
+    return dict(rows)
+
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    for col in df.columns:
+        dtype = dtypes.get(col)
+        if dtype is None:
+            continue
+        if dtype.startswith("datetime64"):
+            df[col] = pd.to_datetime(df[col])
+        elif dtype == "bool":
+            df[col] = df[col].astype(bool)
+        elif dtype.startswith(("int", "uint")) and df[col].notna().all():
+            df[col] = df[col].astype(dtype)
+        elif dtype.startswith("float"):
+            df[col] = df[col].astype(float)
+        elif dtype != "object":
+            # Extension dtypes (Int64, boolean, string, category, ...) take
+            # missing values as they are
+            try:
+                target = pd.api.types.pandas_dtype(dtype)
+            except TypeError:
+                continue
+            if isinstance(target, pd.api.extensions.ExtensionDtype):
+                df[col] = df[col].astype(target)
+    return df
+
+
+def iter_table(db_path, name: str, columns=None, where=None, params=(), chunksize=CHUNK_ROWS):
+    """
+    Stream rows of a stored table as DataFrames of at most chunksize rows.
+
+    `where` is an SQL condition with ? placeholders, e.g. "game_id = ?";
+    conditions on the indexed key columns only read the matching rows.
+    """
+    with closing(connect(db_path)) as con:
+        dtypes = _column_dtypes(con, name)
+        cols = list(columns) if columns is not None else list(dtypes)
+        # SELECT needs at least one column: fetch row_id for column-less tables
+        sql = f"SELECT {', '.join(_quote(c) for c in cols or ['row_id'])} FROM {_quote(name)}"
+        if where:
+            sql += f" WHERE {where}"
+        sql += " ORDER BY row_id"
+
+        cur = con.execute(sql, tuple(params))
+        while True:
+            rows = cur.fetchmany(chunksize)
+            if not rows:
+                break
+            df = pd.DataFrame.from_records(rows, columns=cols or ["row_id"])
+            yield _restore_dtypes(df[cols], dtypes)
+
+
+def read_table(db_path, name: str, columns=None, where=None, params=(), chunksize=CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Read (part of) a stored table into one DataFrame; see iter_table.
+    """
+    chunks = list(iter_table(db_path, name, columns, where, params, chunksize))
+    if not chunks:
+        with closing(connect(db_path)) as con:
+            dtypes = _column_dtypes(con, name)
+        cols = list(columns) if columns is not None else list(dtypes)
+        return _restore_dtypes(pd.DataFrame(columns=cols), dtypes)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_team(db_path, name: str, team_id, seasons=None) -> pd.DataFrame:
+    """
+    All rows of one team, optionally restricted to some season_start_years.
+    """
+    where = "team_id = ?"
+    params = [team_id]
+    if seasons is not None:
+        seasons = [int(s) for s in np.atleast_1d(seasons)]
+        where += f" AND season_start_year IN ({', '.join('?' for _ in seasons)})"
+        params += seasons
+    return read_table(db_path, name, where=where, params=params)
+
+
+def read_player(db_path, name: str, player_id) -> pd.DataFrame:
+    return read_table(db_path, name, where="player_id = ?", params=(player_id,))
+
+
+def read_game(db_path, name: str, game_id) -> pd.DataFrame:
+    return read_table(db_path, name, where="game_id = ?", params=(game_id,))
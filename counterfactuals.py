@@ -0,0 +1,134 @@
+# counterfactuals.py
+import numpy as np
+import pandas as pd
+
+from network_metrics import (
+    METRIC_COLS,
+    adjacency_metrics,
+    dense_adjacency,
+    index_graph_nodes,
+)
+from team_games import GAME_COLS, TEAM_SEASON_COLS
+
+# Max (event, game) pairs scored per dense block
+_CHUNK_PAIRS = 20000
+
+
+def _count_dtypes(pairs: pd.DataFrame) -> pd.DataFrame:
+    # Node/edge counts as nullable ints, like net_n_* in the actual panel
+    for c in ["cf_net_n_players", "cf_net_n_edges"]:
+        pairs[c] = pairs[c].astype("Int64")
+    return pairs
+
+
+def build_counterfactual_panel(departures: pd.DataFrame,
+                               team_games: pd.DataFrame,
+                               passing_edges: pd.DataFrame,
+                               window_before: int = 10) -> pd.DataFrame:
+    """
+    Pre-departure networks with the departed star removed.
+
+    For every departure event and each of the window_before games before the
+    first missed game, take that game's passing network, drop the star's node
+    (row and column of its adjacency matrix) and recompute the cohesion
+    metrics of compute_passing_network_metrics.
+
+    Each game's adjacency is built once and shared by every event that
+    covers it; all (event, game) pairs are then masked and scored as one
+    stacked batch.
+
+    Returns rows like build_departure_event_panel:
+      event_id, season, season_start_year, team_id, player_id,
+      rel_game (< 0), game_id, team_game_index, cf_net_* metric columns
+    plus star_in_network (whether the star had any assist edge that game).
+    Merge onto the event panel on (event_id, rel_game) to compare with the
+    actual post-departure networks.
+    """
+    cf_cols = ["cf_" + c for c in METRIC_COLS]
+    out_cols = (
+        ["event_id"] + TEAM_SEASON_COLS + ["player_id", "rel_game", "game_id", "team_game_index"]
+        + ["star_in_network"] + cf_cols
+    )
+    if departures.empty:
+        return pd.DataFrame(columns=out_cols)
+
+    events = departures.merge(
+        team_games[TEAM_SEASON_COLS + ["game_id", "team_game_index"]],
+        left_on=TEAM_SEASON_COLS + ["first_missed_game_id"],
+        right_on=TEAM_SEASON_COLS + ["game_id"],
+        how="inner",
+    ).drop(columns="game_id")
+
+    # Expand each event to its pre-departure games in one shot
+    rel = np.arange(-window_before, 0)
+    pairs = events.loc[
+        np.repeat(events.index.to_numpy(), len(rel)),
+        ["event_id"] + TEAM_SEASON_COLS + ["player_id", "team_game_index"],
+    ].reset_index(drop=True)
+    pairs["rel_game"] = np.tile(rel, len(events))
+    pairs["team_game_index"] = pairs["team_game_index"] + pairs["rel_game"]
+    pairs = pairs.merge(
+        team_games[TEAM_SEASON_COLS + ["game_id", "team_game_index"]],
+        on=TEAM_SEASON_COLS + ["team_game_index"],
+        how="inner",
+    )
+
+    # Adjacency of just the games some event needs
+    needed = pd.MultiIndex.from_frame(pairs[GAME_COLS].drop_duplicates())
+    edges = passing_edges[pd.MultiIndex.from_frame(passing_edges[GAME_COLS]).isin(needed)]
+
+    pairs["star_in_network"] = False
+    for c in cf_cols:
+        pairs[c] = np.nan
+    if edges.empty:
+        return _count_dtypes(pairs)[out_cols]
+
+    edges, n_nodes = index_graph_nodes(edges, GAME_COLS)
+    graph_keys = pd.MultiIndex.from_frame(edges.drop_duplicates("graph")[GAME_COLS])
+
+    nodes = pd.concat(
+        [
+            edges[["graph", "passer_id", "src"]].set_axis(["graph", "player_id", "node"], axis=1),
+            edges[["graph", "shooter_id", "dst"]].set_axis(["graph", "player_id", "node"], axis=1),
+        ]
+    ).drop_duplicates(["graph", "player_id"])
+    node_of = pd.MultiIndex.from_frame(nodes[["graph", "player_id"]])
+    node_idx = nodes["node"].to_numpy()
+
+    size = int(n_nodes.max())
+    A = dense_adjacency(
+        edges["graph"].to_numpy(),
+        edges["src"].to_numpy(),
+        edges["dst"].to_numpy(),
+        edges["weight"].to_numpy(dtype=float),
+        len(n_nodes),
+        size,
+    )
+
+    pair_graph = graph_keys.get_indexer(pd.MultiIndex.from_frame(pairs[GAME_COLS]))
+    has_graph = pair_graph >= 0
+    loc = node_of.get_indexer(pd.MultiIndex.from_arrays([pair_graph, pairs["player_id"]]))
+    star_node = np.where(loc >= 0, node_idx[np.maximum(loc, 0)], -1)
+    pairs["star_in_network"] = star_node >= 0
+
+    scored = np.flatnonzero(has_graph)
+    results = {c: np.full(len(pairs), np.nan) for c in cf_cols}
+    for lo in range(0, len(scored), _CHUNK_PAIRS):
+        sel = scored[lo:lo + _CHUNK_PAIRS]
+        g = pair_graph[sel]
+        s = star_node[sel]
+
+        A_cf = A[g]
+        mask = np.arange(size)[None, :] < n_nodes[g][:, None]
+        hit = np.flatnonzero(s >= 0)
+        A_cf[hit, s[hit], :] = 0
+        A_cf[hit, :, s[hit]] = 0
+        mask[hit, s[hit]] = False
+
+        metrics = adjacency_metrics(A_cf, node_mask=mask)
+        for c in METRIC_COLS:
+            results["cf_" + c][sel] = metrics[c]
+
+    for c in cf_cols:
+        pairs[c] = results[c]
+    return _count_dtypes(pairs)[out_cols].sort_values(["event_id", "rel_game"]).reset_index(drop=True)
@@ -0,0 +1,215 @@
+# lineups.py
+import numpy as np
+import pandas as pd
+
+from player_events import ACTOR_COLS, extract_player_id, game_elapsed_seconds, quarter_length
+from team_games import GAME_COLS
+from text_columns import has_text, map_unique
+
+
+def build_player_actions(pbp: pd.DataFrame) -> pd.DataFrame:
+    """
+    Long table of every player action with its position in the game.
+
+    One row per (pbp row, actor role) with:
+      season, season_start_year, team_id, game_id, player_id, role,
+      Quarter, SecLeft, elapsed, seq
+    where seq is the row's position in the (game, Quarter, -SecLeft) order,
+    so ties on the clock keep the original play-by-play order.
+    """
+    use_cols = ["season", "season_start_year", "game_id", "event_team", "Quarter", "SecLeft"]
+
+    df = pbp[use_cols + ACTOR_COLS].copy()
+    df["seq"] = np.arange(len(df))
+    df = df.sort_values(
+        ["game_id", "Quarter", "SecLeft", "seq"],
+        ascending=[True, True, False, True],
+        kind="mergesort",
+    )
+    df["seq"] = np.arange(len(df))
+
+    long = df.melt(
+        id_vars=use_cols + ["seq"],
+        value_vars=ACTOR_COLS,
+        var_name="role",
+        value_name="raw_player",
+    )
+    long = long[map_unique(long["raw_player"], has_text, na_value=False, dtype=bool)]
+
+    # Parse each distinct raw string once, then broadcast back
+    long["player_id"] = map_unique(long["raw_player"], extract_player_id)
+
+    long = long.rename(columns={"event_team": "team_id"})
+    long = long[long["team_id"].notna()]
+    long["elapsed"] = game_elapsed_seconds(long["Quarter"], long["SecLeft"])
+
+    return long[
+        GAME_COLS + ["player_id", "role", "Quarter", "SecLeft", "elapsed", "seq"]
+    ].sort_values(["seq", "role"], kind="mergesort").reset_index(drop=True)
+
+
+def infer_quarter_starters(actions: pd.DataFrame) -> pd.DataFrame:
+    """
+    Players on the floor at the start of each quarter.
+
+    A player starts a quarter if his first recorded action in it is anything
+    other than entering the game (he shot, rebounded, left, ...). Players who
+    log no action at all in a quarter cannot be seen and are missed.
+    """
+    first = actions.drop_duplicates(GAME_COLS + ["Quarter", "player_id"], keep="first")
+    starters = first[first["role"] != "EnterGame"]
+    return starters[GAME_COLS + ["Quarter", "player_id"]].reset_index(drop=True)
+
+
+def build_stints(pbp: pd.DataFrame = None, actions: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Replay substitutions for every game at once and return on-floor intervals.
+
+    One row per stint with:
+      season, season_start_year, team_id, game_id, player_id, Quarter,
+      stint_start, stint_end, seconds
+    where stint_start/stint_end are seconds elapsed since tip-off.
+
+    Each player-quarter is a tiny on/off state machine: quarter starters
+    switch on at the period start, EnterGame switches on, LeaveGame switches
+    off and the period end switches everyone off. Repeated transitions in
+    the same state (duplicate or missing sub rows) are collapsed, so the
+    surviving transitions strictly alternate and pair up into stints.
+    """
+    if actions is None:
+        actions = build_player_actions(pbp)
+
+    keys = GAME_COLS + ["player_id", "Quarter"]
+
+    starters = infer_quarter_starters(actions)
+    period_start = game_elapsed_seconds(starters["Quarter"], quarter_length(starters["Quarter"]))
+    starts = starters.assign(elapsed=period_start, seq=-1, state=1)
+
+    subs = actions[actions["role"].isin(["EnterGame", "LeaveGame"])]
+    subs = subs[keys + ["elapsed", "seq"]].assign(
+        state=np.where(subs["role"] == "EnterGame", 1, 0)
+    )
+
+    on_floor = pd.concat([starts[keys], subs[keys]]).drop_duplicates()
+    period_end = game_elapsed_seconds(on_floor["Quarter"], 0)
+    ends = on_floor.assign(elapsed=period_end, seq=np.iinfo(np.int64).max, state=0)
+
+    trans = pd.concat(
+        [starts[keys + ["elapsed", "seq", "state"]], subs, ends[keys + ["elapsed", "seq", "state"]]],
+        ignore_index=True,
+    )
+
+    # Integer group id per player-quarter so all the run logic is numpy
+    trans["grp"] = trans.groupby(keys, sort=False).ngroup()
+    trans = trans.sort_values(["grp", "seq"], kind="mergesort").reset_index(drop=True)
+
+    grp = trans["grp"].to_numpy()
+    state = trans["state"].to_numpy()
+    new_grp = np.r_[True, grp[1:] != grp[:-1]]
+
+    # Keep the first transition of each run of equal states
+    keep = new_grp | np.r_[True, state[1:] != state[:-1]]
+    # A stint can't begin with "off" (only possible for bad data)
+    keep &= ~(new_grp & (state == 0))
+    trans = trans[keep].reset_index(drop=True)
+
+    state = trans["state"].to_numpy()
+    grp = trans["grp"].to_numpy()
+    on_idx = np.flatnonzero(state == 1)
+    off_idx = on_idx + 1
+    valid = off_idx < len(trans)
+    on_idx, off_idx = on_idx[valid], off_idx[valid]
+    valid = grp[off_idx] == grp[on_idx]
+    on_idx, off_idx = on_idx[valid], off_idx[valid]
+
+    stints = trans.loc[on_idx, keys].reset_index(drop=True)
+    stints["stint_start"] = trans["elapsed"].to_numpy()[on_idx]
+    stints["stint_end"] = trans["elapsed"].to_numpy()[off_idx]
+    stints["seconds"] = stints["stint_end"] - stints["stint_start"]
+
+    stints = stints[stints["seconds"] > 0]
+    return stints.sort_values(GAME_COLS + ["stint_start", "player_id"]).reset_index(drop=True)
+
+
+def compute_shared_seconds(stints: pd.DataFrame) -> pd.DataFrame:
+    """
+    Seconds each pair of teammates spent on the floor together, per team-game.
+
+    Returns one row per unordered pair (player_a < player_b) with:
+      season, season_start_year, team_id, game_id, player_a, player_b, shared_seconds
+    """
+    s = stints.reset_index(drop=True)
+    period_keys = GAME_COLS + ["Quarter"]
+    gid = s.groupby(period_keys, sort=False).ngroup().to_numpy()
+
+    # Stints only overlap inside the same period: pair them up with one merge on ints
+    left = pd.DataFrame({"gid": gid, "i": np.arange(len(s))})
+    pairs = left.merge(left, on="gid", suffixes=("_a", "_b"))
+
+    a = pairs["i_a"].to_numpy()
+    b = pairs["i_b"].to_numpy()
+    player = s["player_id"].to_numpy()
+    mask = player[a] < player[b]
+    a, b = a[mask], b[mask]
+
+    start = s["stint_start"].to_numpy()
+    end = s["stint_end"].to_numpy()
+    overlap = np.minimum(end[a], end[b]) - np.maximum(start[a], start[b])
+    mask = overlap > 0
+    a, b, overlap = a[mask], b[mask], overlap[mask]
+
+    out = s.loc[a, GAME_COLS].reset_index(drop=True)
+    out["player_a"] = player[a]
+    out["player_b"] = player[b]
+    out["shared_seconds"] = overlap
+
+    return (
+        out.groupby(GAME_COLS + ["player_a", "player_b"], as_index=False)["shared_seconds"]
+        .sum()
+    )
+
+
+def shared_seconds_long(stints: pd.DataFrame, shared: pd.DataFrame) -> pd.DataFrame:
+    """
+    Symmetric long form of compute_shared_seconds for every team-game at once.
+
+    One row per ordered pair (player_a, player_b) that shared the floor, both
+    directions, plus a diagonal row (player_a == player_b) with each player's
+    total seconds on the floor. Columns: GAME_COLS, player_a, player_b,
+    shared_seconds.
+    """
+    cols = GAME_COLS + ["player_a", "player_b", "shared_seconds"]
+    flipped = shared.rename(columns={"player_a": "player_b", "player_b": "player_a"})
+    totals = stints.groupby(GAME_COLS + ["player_id"], as_index=False)["seconds"].sum()
+    diagonal = pd.DataFrame(
+        {
+            **{k: totals[k] for k in GAME_COLS},
+            "player_a": totals["player_id"],
+            "player_b": totals["player_id"],
+            "shared_seconds": totals["seconds"],
+        }
+    )
+    return pd.concat([shared[cols], flipped[cols], diagonal[cols]], ignore_index=True)
+
+
+def shared_seconds_matrix(stints: pd.DataFrame,
+                          shared: pd.DataFrame,
+                          game_id,
+                          team_id) -> pd.DataFrame:
+    """
+    Square player x player matrix of shared seconds for one team-game.
+    The diagonal holds each player's total seconds on the floor.
+
+    For many team-games, build shared_seconds_long once and pivot its groups.
+    """
+    s = stints[(stints["game_id"] == game_id) & (stints["team_id"] == team_id)]
+    p = shared[(shared["game_id"] == game_id) & (shared["team_id"] == team_id)]
+
+    long = shared_seconds_long(s, p)
+    players = long["player_a"].drop_duplicates().sort_values()
+    return (
+        long.pivot(index="player_a", columns="player_b", values="shared_seconds")
+        .reindex(index=players, columns=players)
+        .fillna(0.0)
+        .rename_axis(index="player_id", columns="player_id")
+    )
@@ -0,0 +1,321 @@
+# live_ingest.py
+"""
+Tail-follow a growing play-by-play CSV and keep per-game metrics current.
+
+Only bytes appended since the last read are parsed (with the csv module,
+not pandas), and only the games those rows belong to are re-scored:
+
+    tail = LiveTail("live/2024_playbyplay.csv")
+    asyncio.run(follow(tail, on_update=lambda rows, stats: print(rows)))
+
+Per game it keeps running assist-edge counts, assists and scores, and
+produces the same passing-edge / network / assist / score columns as the
+batch pipeline (build_team_passing_edges, compute_passing_network_metrics,
+compute_team_assists_per_game, compute_team_outcomes) would for the rows
+seen so far.
+"""
+import asyncio
+import csv
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from network_metrics import METRIC_COLS, adjacency_metrics
+from player_events import extract_player_id
+from team_games import GAME_COLS
+
+# Block size when searching backwards for the last complete line
+_SCAN_BYTES = 1 << 16
+
+LIVE_COLS = GAME_COLS + [
+    "opponent_id",
+    "assists",
+] + METRIC_COLS + [
+    "points_for",
+    "points_against",
+    "point_diff",
+    "n_rows",
+    "quarter",
+    "sec_left",
+]
+
+
+def _season_start_year(date_str: str) -> int:
+    # Same rule as pbp_loader.infer_season_from_date
+    dt = datetime.strptime(date_str.strip(), "%B %d %Y")
+    return dt.year if dt.month >= 10 else dt.year - 1
+
+
+def _clean(value):
+    return value.strip() if value else ""
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LiveGame:
+    """Running state of one game, updated row by row."""
+
+    def __init__(self, game_id, date_str, away, home):
+        self.game_id = game_id
+        self.season_start_year = _season_start_year(date_str)
+        self.season = f"{self.season_start_year}-{str(self.season_start_year + 1)[-2:]}"
+        self.away = away
+        self.home = home
+        # team -> {(passer_id, shooter_id): weight}
+        self.edges = {away: {}, home: {}}
+        self.assists = {away: 0, home: 0}
+        self.away_score = None
+        self.home_score = None
+        self.n_rows = 0
+        self.quarter = None
+        self.sec_left = None
+
+    def add(self, row: dict):
+        self.n_rows += 1
+        away_play = _clean(row.get("AwayPlay"))
+        home_play = _clean(row.get("HomePlay"))
+
+        if "assist by" in away_play:
+            self.assists[self.away] += 1
+        if "assist by" in home_play:
+            self.assists[self.home] += 1
+
+        team = self.away if away_play else (self.home if home_play else None)
+        assister = _clean(row.get("Assister"))
+        shooter = _clean(row.get("Shooter"))
+        if team is not None and assister and shooter:
+            key = (extract_player_id(assister), extract_player_id(shooter))
+            if key[0].strip() and key[1].strip():
+                edges = self.edges[team]
+                edges[key] = edges.get(key, 0) + 1
+
+        # Final scores are the max seen (scores only increase)
+        away_score = _to_float(row.get("AwayScore"))
+        home_score = _to_float(row.get("HomeScore"))
+        if away_score is not None:
+            self.away_score = away_score if self.away_score is None else max(self.away_score, away_score)
+        if home_score is not None:
+            self.home_score = home_score if self.home_score is None else max(self.home_score, home_score)
+
+        quarter = _to_float(row.get("Quarter"))
+        sec_left = _to_float(row.get("SecLeft"))
+        if quarter is not None and sec_left is not None:
+            clock = (quarter, -sec_left)
+            if self.quarter is None or clock > (self.quarter, -self.sec_left):
+                self.quarter, self.sec_left = int(quarter), int(sec_left)
+
+    def network_metrics(self, team) -> dict:
+        """compute_passing_network_metrics for one team's edges so far."""
+        edges = self.edges[team]
+        if not edges:
+            return {c: np.nan for c in METRIC_COLS}
+
+        # Node order: first appearance over edges sorted by (passer, shooter)
+        node = {}
+        for passer, shooter in sorted(edges):
+            node.setdefault(passer, len(node))
+            node.setdefault(shooter, len(node))
+        n = len(node)
+        A = np.zeros((1, n, n))
+        for (passer, shooter), w in edges.items():
+            A[0, node[passer], node[shooter]] = w
+
+        metrics = adjacency_metrics(A, np.array([n]))
+        return {c: metrics[c][0] for c in METRIC_COLS}
+
+    def team_rows(self) -> list:
+        rows = []
+        for team, opp, pf, pa in [
+            (self.away, self.home, self.away_score, self.home_score),
+            (self.home, self.away, self.home_score, self.away_score),
+        ]:
+            row = {
+                "season": self.season,
+                "season_start_year": self.season_start_year,
+                "team_id": team,
+                "game_id": self.game_id,
+                "opponent_id": opp,
+                "assists": self.assists[team],
+            }
+            row.update(self.network_metrics(team))
+            row["points_for"] = pf
+            row["points_against"] = pa
+            row["point_diff"] = pf - pa if pf is not None and pa is not None else None
+            row["n_rows"] = self.n_rows
+            row["quarter"] = self.quarter
+            row["sec_left"] = self.sec_left
+            rows.append(row)
+        return rows
+
+    def passing_edges(self) -> list:
+        return [
+            {
+                "season": self.season,
+                "season_start_year": self.season_start_year,
+                "team_id": team,
+                "game_id": self.game_id,
+                "passer_id": passer,
+                "shooter_id": shooter,
+                "weight": w,
+            }
+            for team, edges in self.edges.items()
+            for (passer, shooter), w in sorted(edges.items())
+        ]
+
+
+class LiveTail:
+    """
+    Incremental reader for one growing play-by-play CSV.
+
+    Remembers the byte offset of the last complete line read; a trailing
+    partial line is kept until the writer finishes it. If the file shrinks
+    (truncated or replaced) everything is re-read from the start.
+    """
+
+    def __init__(self, path, from_start: bool = True):
+        self.path = str(path)
+        self.games = {}
+        self._header = None
+        self._offset = 0
+        self._partial = b""
+        if not from_start and os.path.exists(self.path):
+            self._skip_existing()
+
+    def _skip_existing(self):
+        """Read the header, then start just after the last complete line."""
+        with open(self.path, "rb") as f:
+            first = f.readline()
+            if not first.endswith(b"\n"):
+                # No complete header line yet: read everything from the start
+                return
+            header = next(csv.reader([first.decode("utf-8")]), None)
+            if not header:
+                return
+
+            # Scan back from the end for the last newline (a writer may be
+            # partway through a row)
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            while pos > len(first):
+                step = min(_SCAN_BYTES, pos - len(first))
+                pos -= step
+                f.seek(pos)
+                nl = f.read(step).rfind(b"\n")
+                if nl >= 0:
+                    self._offset = pos + nl + 1
+                    break
+            else:
+                self._offset = len(first)
+        self._header = header
+
+    def reset(self):
+        self.games = {}
+        self._header = None
+        self._offset = 0
+        self._partial = b""
+
+    def size(self) -> int:
+        try:
+            return os.stat(self.path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _read_new_lines(self) -> list:
+        size = self.size()
+        if size < self._offset:
+            self.reset()
+        if size == self._offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        self._offset += len(chunk)
+
+        data = self._partial + chunk
+        end = data.rfind(b"\n") + 1
+        self._partial = data[end:]
+        return data[:end].decode("utf-8").splitlines()
+
+    def poll(self) -> set:
+        """Parse newly appended rows; return the game_ids they touched."""
+        lines = self._read_new_lines()
+        if not lines:
+            return set()
+        reader = csv.reader(lines)
+        if self._header is None:
+            self._header = next(reader, None) or None
+            if self._header is None:
+                return set()
+
+        header = self._header
+        touched = set()
+        for values in reader:
+            # Blank or malformed lines (wrong field count) are skipped
+            if len(values) != len(header):
+                continue
+            row = dict(zip(header, values))
+            game_id = row.get("URL")
+            if not game_id:
+                continue
+            game = self.games.get(game_id)
+            if game is None:
+                game = LiveGame(game_id, row["Date"], row["AwayTeam"], row["HomeTeam"])
+                self.games[game_id] = game
+            game.add(row)
+            touched.add(game_id)
+        return touched
+
+    def game_metrics(self, game_ids=None) -> pd.DataFrame:
+        """Two rows (away, home) per game with LIVE_COLS, for game_ids or all games."""
+        ids = self.games if game_ids is None else game_ids
+        rows = [r for g in ids for r in self.games[g].team_rows()]
+        return pd.DataFrame(rows, columns=LIVE_COLS)
+
+    def passing_edges(self, game_ids=None) -> pd.DataFrame:
+        """build_team_passing_edges output for the rows read so far."""
+        ids = self.games if game_ids is None else game_ids
+        rows = [e for g in ids for e in self.games[g].passing_edges()]
+        return pd.DataFrame(
+            rows, columns=GAME_COLS + ["passer_id", "shooter_id", "weight"]
+        )
+
+
+async def follow(tail: LiveTail, on_update, interval: float = 0.05, stop: asyncio.Event = None):
+    """
+    Watch tail.path and call on_update(rows, stats) after each append.
+
+    rows is LiveTail.game_metrics for just the games touched by the new
+    rows; stats has n_games and latency_ms (read + parse + re-score). The
+    file's size is checked every `interval` seconds on the event loop, so
+    other coroutines (e.g. a dashboard server) keep running in between.
+    Runs until `stop` is set.
+    """
+    stop = stop or asyncio.Event()
+    last_size = -1
+    while not stop.is_set():
+        size = tail.size()
+        if size != last_size:
+            last_size = size
+            t0 = time.perf_counter()
+            touched = tail.poll()
+            if touched:
+                rows = tail.game_metrics(sorted(touched))
+                stats = {
+                    "n_games": len(touched),
+                    "latency_ms": (time.perf_counter() - t0) * 1000.0,
+                }
+                result = on_update(rows, stats)
+                if asyncio.iscoroutine(result):
+                    await result
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
@@ -1,79 +1,173 @@
-from pbp_loader import load_pbp
+import time
+
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from pbp_loader import load_pbp, scan_seasons
+from text_columns import DEFAULT_STRING_STORAGE, available_string_storages
+from sampling import achieved_game_frac, estimate_from_sample, restrict_to_sample, sampled_teams_of
 from player_events import make_player_events
 from stars import compute_player_usage, flag_team_stars
-from team_games import build_team_games
-from outcomes import compute_team_outcomes
+from team_games import GAME_COLS, TEAM_SEASON_COLS, build_team_games
+from outcomes import compute_team_outcomes, compute_score_flow_features
 from appearances_and_departures import (
     build_player_game_appearances,
-    build_star_games,
-    detect_departures,
     summarize_departures,
 )
-
+from star_availability import build_star_availability, detect_departures_from_availability
+from player_movement import build_player_team_index, classify_departures
 from quick_metrics import compute_team_assists_per_game
 from network_metrics import build_team_passing_edges, compute_passing_network_metrics
 from event_study import build_departure_event_panel
+from matchups import build_matchup_features
 
-# New visualization modules (RQ1, RQ2, RQ3)
-from viz_rq1 import (
-    plot_rq1_histograms,
-    plot_rq1_scatter_relations,
-)
-from viz_rq2 import (
-    plot_rq2_ci,
-    plot_rq2_facets,
-    plot_rq2_pre_post,
-)
-from viz_rq3 import (
-    plot_rq3_logit_coefficients,
-    plot_rq3_feature_importance,
-)
+# Plotting/modeling modules (matplotlib, seaborn, scipy, sklearn) are imported
+# inside the functions that need them so table-only commands start quickly.
 
-def main():
-    # Load all available seasons from the NBA-Data directory (2015–2021)
-    pbp = load_pbp("NBA-Data")
+# Seconds allowed between interpreter start of this module and the first
+# unit of work on the compute-only path (checked with --check-startup).
+STARTUP_BUDGET_S = 1.0
+
+
+# ===========================================================
+# Pipeline stages
+# ===========================================================
+def build_departures(pbp, events_long=None, team_games=None):
+    """
+    Star flagging + departure detection, with each departure tagged as
+    trade / absence / season_end.
+
+    Returns (team_games, stars, departures).
+    """
+    if events_long is None:
+        events_long = make_player_events(pbp)
+    if team_games is None:
+        team_games = build_team_games(pbp)
 
-    # --- Build player-level and team-level activity ---
-    events_long = make_player_events(pbp)
     usage = compute_player_usage(events_long)
     stars = flag_team_stars(usage, star_quantile=0.9)
 
-    team_games = build_team_games(pbp)
     appearances = build_player_game_appearances(events_long)
-    star_games = build_star_games(team_games, appearances, stars)
-    team_outcomes = compute_team_outcomes(pbp)
+    # Packed-bit availability instead of the long star x game panel
+    availability = build_star_availability(team_games, appearances, stars)
+
+    departures = detect_departures_from_availability(availability, min_pre_run=5, min_absence=3)
+    # Tell trades apart from injuries/absences and season ends
+    departures = classify_departures(departures, build_player_team_index(events_long), team_games)
+    return team_games, stars, departures
 
-    # Detect star departures
-    departures = detect_departures(star_games, min_pre_run=5, min_absence=3)
-    print(summarize_departures(departures))
 
-    # --- Build team_metrics (assists + network metrics + outcomes) ---
+def build_team_metrics(pbp, team_games=None, passing_edges=None):
+    """
+    team_games + assists + passing-network metrics + outcomes + score-flow
+    features + opponent/differential matchup features, one row per team-game.
+    """
+    if team_games is None:
+        team_games = build_team_games(pbp)
+    if passing_edges is None:
+        passing_edges = build_team_passing_edges(pbp)
+
+    team_outcomes = compute_team_outcomes(pbp)
+    score_flow = compute_score_flow_features(pbp)
     assists = compute_team_assists_per_game(pbp)
-    passing_edges = build_team_passing_edges(pbp)
     net_metrics = compute_passing_network_metrics(passing_edges)
 
     team_metrics = (
-        team_games.merge(
-            assists,
-            on=["season", "season_start_year", "team_id", "game_id"],
-            how="left",
-        )
-        .merge(
-            net_metrics,
-            on=["season", "season_start_year", "team_id", "game_id"],
-            how="left",
-        )
-        .merge(
-            team_outcomes,
-            on=["season", "season_start_year", "team_id", "game_id"],
-            how="left",
-        )
+        team_games.merge(assists, on=GAME_COLS, how="left")
+        .merge(net_metrics, on=GAME_COLS, how="left")
+        .merge(team_outcomes, on=GAME_COLS, how="left")
+        .merge(score_flow, on=GAME_COLS, how="left")
     )
 
     team_metrics["assists"] = team_metrics["assists"].fillna(0)
+    return build_matchup_features(team_metrics)
+
+
+def compute_season_tables(pbp):
+    """
+    Every stage that only looks within a season, on one play-by-play frame.
+
+    Returns a dict with stars, team_games, departures, passing_edges, team_metrics
+    (plus sampled_teams, restricted to the sampled teams, if pbp was sampled).
+    """
+    team_games, stars, departures = build_departures(pbp)
+    passing_edges = build_team_passing_edges(pbp)
+    team_metrics = build_team_metrics(pbp, team_games=team_games, passing_edges=passing_edges)
+    tables = {
+        "stars": stars,
+        "team_games": team_games,
+        "departures": departures,
+        "passing_edges": passing_edges,
+        "team_metrics": team_metrics,
+    }
+    sampled_teams = sampled_teams_of(pbp)
+    if sampled_teams is not None:
+        tables = restrict_to_sample(tables, sampled_teams)
+    return tables
+
+
+def _season_worker(files, season_start_year, sample_frac=None, sample_seed=0, string_storage=DEFAULT_STRING_STORAGE):
+    # Runs in a child process: load one season, return only the result tables
+    pbp = load_pbp(
+        files,
+        seasons=[season_start_year],
+        sample_frac=sample_frac,
+        sample_seed=sample_seed,
+        string_storage=string_storage,
+    )
+    return compute_season_tables(pbp)
+
 
-    # --- Build event-study panel ---
-    event_panel = build_departure_event_panel(
+def compute_tables(data_dir, workers=None, sample_frac=None, sample_seed=0, string_storage=DEFAULT_STRING_STORAGE):
+    """
+    Season-local tables for all data in data_dir (see compute_season_tables).
+
+    With workers > 1 each season is loaded and processed in its own process
+    and the per-season tables are concatenated afterwards; departure
+    event_ids are then renumbered across seasons, in the serial order.
+
+    sample_frac runs on a deterministic sample of team schedules instead of
+    all games (see sampling.sample_games). string_storage is passed to load_pbp.
+    """
+    if not workers or workers <= 1:
+        pbp = load_pbp(data_dir, sample_frac=sample_frac, sample_seed=sample_seed, string_storage=string_storage)
+        return compute_season_tables(pbp)
+
+    partitions = scan_seasons(data_dir)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_season_worker, files, season, sample_frac, sample_seed, string_storage)
+            for season, files in sorted(partitions.items())
+        ]
+        results = [f.result() for f in futures]
+
+    tables = {
+        name: pd.concat([r[name] for r in results], ignore_index=True)
+        for name in results[0]
+    }
+
+    departures = tables["departures"]
+    if not departures.empty:
+        departures["event_id"] = range(len(departures))
+
+    return tables
+
+
+def build_event_panel(departures, team_games, team_metrics):
+    if departures.empty:
+        # No departures (common on small --sample runs): same columns, no rows
+        metric_cols = [c for c in team_metrics.columns if c not in GAME_COLS + ["team_game_index", "game_date"]]
+        return pd.DataFrame(
+            columns=["game_id", "team_game_index", "rel_game"] + TEAM_SEASON_COLS + metric_cols + ["event_id"]
+        )
+    return build_departure_event_panel(
         departures=departures,
         team_games=team_games,
         team_metrics=team_metrics,
@@ -81,24 +175,319 @@ def main():
         window_after=10,
     )
 
+
+def run_plots(team_metrics, event_panel, rq=("rq1", "rq2")):
     # ===========================================================
     # RQ1: Do cohesive networks associate with team success?
     # ===========================================================
-    plot_rq1_histograms(team_metrics)
-    plot_rq1_scatter_relations(team_metrics)
+    if "rq1" in rq:
+        from viz_rq1 import plot_rq1_histograms, plot_rq1_scatter_relations
+
+        plot_rq1_histograms(team_metrics)
+        plot_rq1_scatter_relations(team_metrics)
 
     # ===========================================================
     # RQ2: How do key-player departures affect network cohesion?
     # ===========================================================
-    plot_rq2_ci(event_panel)
-    plot_rq2_facets(event_panel)
-    plot_rq2_pre_post(event_panel)
+    if "rq2" in rq and event_panel.empty:
+        print("No departure events: skipping RQ2 plots")
+    elif "rq2" in rq:
+        from viz_rq2 import plot_rq2_ci, plot_rq2_facets, plot_rq2_pre_post
+
+        plot_rq2_ci(event_panel)
+        plot_rq2_facets(event_panel)
+        plot_rq2_pre_post(event_panel)
 
+
+def run_models(team_metrics):
     # ===========================================================
     # RQ3: Which network metrics best predict team success?
     # ===========================================================
+    from viz_rq3 import MATCHUP_FEATURES, plot_rq3_logit_coefficients, plot_rq3_feature_importance
+
     plot_rq3_logit_coefficients(team_metrics)
     plot_rq3_feature_importance(team_metrics)
 
+    # Same model with opponent-aware matchup features
+    plot_rq3_logit_coefficients(team_metrics, features=MATCHUP_FEATURES)
+
+
+def report_sample(tables):
+    """Print population estimates (with standard errors) for a sampled run."""
+    if "sampled_teams" not in tables:
+        return
+    sampled_teams = tables["sampled_teams"]
+    est = estimate_from_sample(tables["team_metrics"], tables["departures"], sampled_teams)
+    print(
+        f"Sampled run: {int(sampled_teams['sampled'].sum())}/{len(sampled_teams)} team-seasons, "
+        f"{achieved_game_frac(sampled_teams):.1%} of games; approximate metrics"
+    )
+    print(est.to_string(index=False))
+
+
+def main(data_dir="NBA-Data", workers=None, sample_frac=None, sample_seed=0, string_storage=DEFAULT_STRING_STORAGE):
+    # Load all available seasons from the NBA-Data directory (2015–2021)
+    tables = compute_tables(
+        data_dir,
+        workers=workers,
+        sample_frac=sample_frac,
+        sample_seed=sample_seed,
+        string_storage=string_storage,
+    )
+    team_games = tables["team_games"]
+    departures = tables["departures"]
+    team_metrics = tables["team_metrics"]
+    print(summarize_departures(departures))
+    report_sample(tables)
+
+    event_panel = build_event_panel(departures, team_games, team_metrics)
+
+    run_plots(team_metrics, event_panel)
+    run_models(team_metrics)
+
+
+# ===========================================================
+# Command-line interface
+# ===========================================================
+def _write_table(df, out):
+    if out:
+        df.to_csv(out, index=False)
+        print(f"Wrote {len(df)} rows to {out}")
+
+
+def cmd_ingest(args):
+    pbp = load_pbp(args.data_dir, string_storage=args.string_storage)
+    print(
+        {
+            "n_rows": len(pbp),
+            "n_games": int(pbp["game_id"].nunique()),
+            "seasons": sorted(pbp["season"].unique().tolist()),
+        }
+    )
+    _write_table(pbp, args.out)
+
+
+def _tables(args):
+    tables = compute_tables(
+        args.data_dir,
+        workers=args.workers,
+        sample_frac=args.sample,
+        sample_seed=args.sample_seed,
+        string_storage=args.string_storage,
+    )
+    report_sample(tables)
+    return tables
+
+
+def _full_serial(args):
+    return not (args.workers and args.workers > 1) and args.sample is None
+
+
+def _team_metrics_only(args):
+    if _full_serial(args):
+        return build_team_metrics(load_pbp(args.data_dir, string_storage=args.string_storage))
+    return _tables(args)["team_metrics"]
+
+
+def cmd_compute(args):
+    team_metrics = _team_metrics_only(args)
+    print(f"team_metrics: {len(team_metrics)} rows, {team_metrics.shape[1]} columns")
+    _write_table(team_metrics, args.out)
+
+
+def cmd_departures(args):
+    if _full_serial(args):
+        _, _, departures = build_departures(load_pbp(args.data_dir, string_storage=args.string_storage))
+    else:
+        departures = _tables(args)["departures"]
+    print(summarize_departures(departures))
+    _write_table(departures, args.out)
+
+
+def cmd_export(args):
+    t = _tables(args)
+    team_metrics = t["team_metrics"]
+    departures = t["departures"]
+    passing_edges = t["passing_edges"]
+    event_panel = build_event_panel(departures, t["team_games"], team_metrics)
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tables = {
+        "team_metrics": team_metrics,
+        "departures": departures,
+        "event_panel": event_panel,
+        "passing_edges": passing_edges,
+    }
+    for name, df in tables.items():
+        # Write then rename so a running query server never reads a partial file
+        path = out_dir / f"{name}.csv"
+        tmp = path.with_suffix(".csv.tmp")
+        df.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+        print(f"Wrote {len(df)} rows to {path}")
+
+    if args.db:
+        from artifact_store import write_tables
+
+        write_tables(args.db, {**tables, "stars": t["stars"]})
+        print(f"Wrote {len(tables) + 1} tables to {args.db}")
+
+
+def cmd_serve(args):
+    from query_server import serve
+
+    serve(args.artifact_dir, host=args.host, port=args.port)
+
+
+def cmd_follow(args):
+    import asyncio
+
+    from live_ingest import LiveTail, follow
+
+    tail = LiveTail(args.file, from_start=not args.from_end)
+
+    def on_update(rows, stats):
+        for r in rows.itertuples(index=False):
+            print(
+                f"{r.game_id} {r.team_id}: {r.points_for}-{r.points_against} "
+                f"ast={r.assists} density={r.net_density:.3f} "
+                f"({stats['latency_ms']:.1f} ms)"
+            )
+        if args.out:
+            path = Path(args.out)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tail.game_metrics().to_csv(tmp, index=False)
+            os.replace(tmp, path)
+
+    print(f"Following {args.file} (Ctrl-C to stop)")
+    try:
+        asyncio.run(follow(tail, on_update, interval=args.interval))
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_plot(args):
+    t = _tables(args)
+    event_panel = build_event_panel(t["departures"], t["team_games"], t["team_metrics"])
+    run_plots(t["team_metrics"], event_panel, rq=args.rq)
+
+
+def cmd_model(args):
+    team_metrics = _team_metrics_only(args)
+    run_models(team_metrics)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="NBA passing-network analysis pipeline.",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default="NBA-Data",
+        help="Directory (or single CSV) with Kaggle play-by-play data.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Run the per-season stages in this many worker processes.",
+    )
+    parser.add_argument(
+        "--sample",
+        type=float,
+        default=None,
+        metavar="FRAC",
+        help="Fast mode: run on a deterministic ~FRAC share of games (whole team schedules).",
+    )
+    parser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=0,
+        help="Seed for --sample; the same seed always selects the same teams.",
+    )
+    parser.add_argument(
+        "--string-storage",
+        choices=available_string_storages(),
+        default=DEFAULT_STRING_STORAGE,
+        help="How play text/actor columns are stored in memory (category = dictionary codes; "
+        "pyarrow is offered when pyarrow is installed).",
+    )
+    parser.add_argument(
+        "--check-startup",
+        action="store_true",
+        help=f"Report import time and fail if it exceeds {STARTUP_BUDGET_S:.1f}s.",
+    )
+
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("ingest", help="Load play-by-play data and summarize it.")
+    p.add_argument("--out", help="Optional CSV path for the loaded table.")
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("compute", help="Build the team_metrics table (no plotting).")
+    p.add_argument("--out", help="Optional CSV path for team_metrics.")
+    p.set_defaults(func=cmd_compute)
+
+    p = sub.add_parser("departures", help="Detect star departures.")
+    p.add_argument("--out", help="Optional CSV path for departure events.")
+    p.set_defaults(func=cmd_departures)
+
+    p = sub.add_parser("export", help="Write all pipeline tables for the query server.")
+    p.add_argument("--out-dir", default="artifacts", help="Directory for the CSV tables.")
+    p.add_argument("--db", help="Also write all tables (plus stars) to this SQLite file.")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("serve", help="Serve lookups over exported tables via HTTP.")
+    p.add_argument("--artifact-dir", default="artifacts", help="Directory written by export.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8608)
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser("follow", help="Tail a growing play-by-play CSV and update live game metrics.")
+    p.add_argument("file", help="Play-by-play CSV that is being appended to.")
+    p.add_argument("--interval", type=float, default=0.05, help="Seconds between file checks.")
+    p.add_argument("--from-end", action="store_true", help="Ignore rows already in the file.")
+    p.add_argument("--out", help="CSV rewritten with all live game rows after every update.")
+    p.set_defaults(func=cmd_follow)
+
+    p = sub.add_parser("plot", help="Draw RQ1/RQ2 figures.")
+    p.add_argument(
+        "--rq",
+        nargs="+",
+        choices=["rq1", "rq2"],
+        default=["rq1", "rq2"],
+        help="Which research questions to plot.",
+    )
+    p.set_defaults(func=cmd_plot)
+
+    p = sub.add_parser("model", help="Fit and plot the RQ3 win models.")
+    p.set_defaults(func=cmd_model)
+
+    return parser
+
+
+def cli(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.check_startup:
+        startup = time.perf_counter() - _IMPORT_START
+        print(f"Startup: {startup:.3f}s (budget {STARTUP_BUDGET_S:.1f}s)")
+        if startup > STARTUP_BUDGET_S:
+            return 1
+
+    if args.command is None:
+        main(
+            args.data_dir,
+            workers=args.workers,
+            sample_frac=args.sample,
+            sample_seed=args.sample_seed,
+            string_storage=args.string_storage,
+        )
+    else:
+        args.func(args)
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(cli())
@@ -0,0 +1,75 @@
+# matchups.py
+import numpy as np
+import pandas as pd
+
+from network_metrics import METRIC_COLS
+from team_games import TEAM_SEASON_COLS
+
+MATCHUP_METRICS = ["assists"] + METRIC_COLS
+
+# Rolling pre-game form: source column -> feature name
+STRENGTH_COLS = {"win": "pre_win_pct", "point_diff": "pre_point_diff"}
+
+
+def _rolling_pregame_mean(values: np.ndarray, group_start: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the previous `window` values within each group (rows sorted by
+    group, then time; group_start[i] is the first row of row i's group).
+    NaNs are skipped; NaN where no earlier value exists.
+    """
+    ok = ~np.isnan(values)
+    total = np.r_[0.0, np.cumsum(np.where(ok, values, 0.0))]
+    count = np.r_[0, np.cumsum(ok)]
+    i = np.arange(len(values))
+    lo = np.maximum(i - window, group_start)
+    n = count[i] - count[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, (total[i] - total[lo]) / n, np.nan)
+
+
+def build_matchup_features(team_metrics: pd.DataFrame,
+                           metrics=None,
+                           window: int = 10) -> pd.DataFrame:
+    """
+    Add opponent and differential versions of team-game metrics.
+
+    Each game's two team rows are paired with one self-join on game_id. For
+    every metric m (default: assists + passing-network metrics) this adds
+    opp_m (the opponent's value that game) and diff_m (own - opponent).
+
+    Pre-game strength: pre_win_pct / pre_point_diff are the team's mean win
+    and point_diff over its previous `window` games of the season (NaN before
+    its first game), with opp_ and diff_ versions as well.
+
+    Rows whose opponent is missing get NaN opponent features. Everything is
+    a sort, a cumulative sum or a merge, so cost grows linearly with games.
+    """
+    metrics = [m for m in (metrics or MATCHUP_METRICS) if m in team_metrics.columns]
+    out = team_metrics.reset_index(drop=True)
+
+    strength = [c for c in STRENGTH_COLS if c in out.columns]
+    if strength:
+        order = out.sort_values(TEAM_SEASON_COLS + ["team_game_index"]).index.to_numpy()
+        ts = out.iloc[order].groupby(TEAM_SEASON_COLS, sort=False).ngroup().to_numpy()
+        new_group = np.r_[True, ts[1:] != ts[:-1]] if len(ts) else np.array([], dtype=bool)
+        group_start = np.maximum.accumulate(np.where(new_group, np.arange(len(ts)), 0))
+        for col in strength:
+            values = out[col].to_numpy(dtype=float)[order]
+            feature = np.empty(len(out))
+            feature[order] = _rolling_pregame_mean(values, group_start, window)
+            out[STRENGTH_COLS[col]] = feature
+
+    paired = metrics + [STRENGTH_COLS[c] for c in strength]
+    opp = out[["game_id", "team_id"] + paired].rename(
+        columns={"team_id": "opp_team_id", **{c: "opp_" + c for c in paired}}
+    )
+    # 2 rows per game on each side -> 4 joined rows, 2 kept
+    joined = out[["game_id", "team_id"]].reset_index().merge(opp, on="game_id", how="inner")
+    joined = joined[joined["team_id"] != joined["opp_team_id"]].set_index("index")
+
+    out["opp_team_id"] = joined["opp_team_id"].reindex(out.index)
+    for c in paired:
+        out["opp_" + c] = joined["opp_" + c].reindex(out.index)
+        out["diff_" + c] = out[c] - out["opp_" + c]
+
+    return out
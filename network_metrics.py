@@ -1,11 +1,43 @@
 import pandas as pd
 import numpy as np
-import networkx as nx
 
-from player_events import extract_player_id
+from player_events import extract_player_id, game_elapsed_seconds
+from team_games import GAME_COLS
+from text_columns import has_text, map_unique
 
 
-def build_team_passing_edges(pbp: pd.DataFrame) -> pd.DataFrame:
+
+METRIC_COLS = [
+    "net_n_players",
+    "net_n_edges",
+    "net_density",
+    "net_clustering",
+    "net_reciprocity",
+]
+
+# Max number of graphs stacked into one dense adjacency block
+_CHUNK_GRAPHS = 20000
+
+
+def assign_time_bins(pbp: pd.DataFrame, time_bin) -> pd.Series:
+    """
+    Time bin of each play-by-play row.
+
+    time_bin="quarter" uses the Quarter number; an int splits the game clock
+    into fixed windows of that many seconds (0 = first window). A play at the
+    exact end of a window (e.g. SecLeft=0) belongs to the window it closes.
+    """
+    if time_bin == "quarter":
+        return pbp["Quarter"].astype(int)
+
+    window = int(time_bin)
+    if window <= 0:
+        raise ValueError(f"time_bin window must be positive, got {time_bin!r}")
+    elapsed = game_elapsed_seconds(pbp["Quarter"], pbp["SecLeft"])
+    return pd.Series(np.clip(elapsed - 1, 0, None) // window, index=pbp.index)
+
+
+def build_team_passing_edges(pbp: pd.DataFrame, time_bin=None) -> pd.DataFrame:
     """
     Build directed passer->shooter assist edges for each (season, team, game).
 
@@ -13,6 +45,9 @@ def build_team_passing_edges(pbp: pd.DataFrame) -> pd.DataFrame:
       season, season_start_year, team_id, game_id,
       passer_id, shooter_id, weight
     where weight is the count of assists from passer to shooter in that game.
+
+    With time_bin ("quarter" or a window length in seconds, see
+    assign_time_bins) edges are split further by a time_bin column.
     """
     if "Assister" not in pbp.columns or "Shooter" not in pbp.columns:
         raise KeyError("Expected 'Assister' and 'Shooter' columns in pbp data.")
@@ -20,9 +55,7 @@ def build_team_passing_edges(pbp: pd.DataFrame) -> pd.DataFrame:
     pbp_local = pbp.copy()
 
     # Assisted baskets: rows where Assister is non-empty
-    assist_mask = pbp_local["Assister"].notna() & (
-        pbp_local["Assister"].astype(str).str.strip() != ""
-    )
+    assist_mask = map_unique(pbp_local["Assister"], has_text, na_value=False, dtype=bool)
 
     edges = pbp_local.loc[
         assist_mask,
@@ -38,27 +71,24 @@ def build_team_passing_edges(pbp: pd.DataFrame) -> pd.DataFrame:
 
     edges = edges.rename(columns={"event_team": "team_id"})
 
-    # Convert raw player strings like "A. Drummond - drumman01" to stable IDs
-    edges["passer_id"] = edges["Assister"].apply(extract_player_id)
-    edges["shooter_id"] = edges["Shooter"].apply(extract_player_id)
+    group_cols = GAME_COLS.copy()
+    if time_bin is not None:
+        edges["time_bin"] = assign_time_bins(pbp_local.loc[assist_mask], time_bin)
+        group_cols.append("time_bin")
+
+    # Convert raw player strings like "A. Drummond - drumman01" to stable IDs,
+    # parsing each distinct string once
+    edges["passer_id"] = map_unique(edges["Assister"], extract_player_id)
+    edges["shooter_id"] = map_unique(edges["Shooter"], extract_player_id)
 
     edges = edges[
-        edges["passer_id"].notna()
-        & (edges["passer_id"].astype(str).str.strip() != "")
-        & edges["shooter_id"].notna()
-        & (edges["shooter_id"].astype(str).str.strip() != "")
+        map_unique(edges["passer_id"], has_text, na_value=False, dtype=bool)
+        & map_unique(edges["shooter_id"], has_text, na_value=False, dtype=bool)
     ].copy()
 
     grouped = (
         edges.groupby(
-            [
-                "season",
-                "season_start_year",
-                "team_id",
-                "game_id",
-                "passer_id",
-                "shooter_id",
-            ],
+            group_cols + ["passer_id", "shooter_id"],
             as_index=False,
         )
         .size()
@@ -68,6 +98,119 @@ def build_team_passing_edges(pbp: pd.DataFrame) -> pd.DataFrame:
     return grouped
 
 
+def index_graph_nodes(edges: pd.DataFrame, group_cols):
+    """
+    Give every graph an integer id and every node a local index within its graph.
+
+    Nodes are numbered in order of first appearance (passer before shooter,
+    edge by edge), i.e. the insertion order networkx would use when adding
+    the edges one at a time.
+
+    Returns (edges, n_nodes) where edges is sorted with added columns
+    graph, src, dst and n_nodes is an array of node counts per graph.
+    """
+    edges = edges.sort_values(group_cols + ["passer_id", "shooter_id"]).reset_index(drop=True)
+    graph = edges.groupby(group_cols, sort=False).ngroup().to_numpy()
+
+    n = len(edges)
+    appear = pd.DataFrame(
+        {
+            "graph": np.repeat(graph, 2),
+            "player_id": np.column_stack(
+                [edges["passer_id"].to_numpy(), edges["shooter_id"].to_numpy()]
+            ).ravel(),
+        }
+    )
+    nodes = appear.drop_duplicates(["graph", "player_id"])
+    nodes = nodes.assign(node=nodes.groupby("graph").cumcount().to_numpy())
+
+    node_of = pd.MultiIndex.from_frame(nodes[["graph", "player_id"]])
+    node_idx = nodes["node"].to_numpy()
+    src = node_idx[node_of.get_indexer(pd.MultiIndex.from_arrays([graph, edges["passer_id"]]))]
+    dst = node_idx[node_of.get_indexer(pd.MultiIndex.from_arrays([graph, edges["shooter_id"]]))]
+
+    edges["graph"] = graph
+    edges["src"] = src
+    edges["dst"] = dst
+    n_nodes = np.bincount(nodes["graph"].to_numpy(), minlength=graph.max() + 1 if n else 0)
+
+    return edges, n_nodes
+
+
+def dense_adjacency(graph, src, dst, weight, n_graphs, size):
+    """Stack directed weighted adjacency matrices into a (n_graphs, size, size) array."""
+    A = np.zeros((n_graphs, size, size))
+    np.add.at(A, (graph, src, dst), weight)
+    return A
+
+
+def adjacency_metrics(A: np.ndarray, n_nodes: np.ndarray = None, node_mask: np.ndarray = None) -> dict:
+    """
+    Cohesion metrics for a stack of directed weighted adjacency matrices.
+
+    Mirrors networkx: density of the DiGraph, reciprocity, and mean weighted
+    clustering of the undirected version. When both directions of an edge
+    exist, the undirected weight is that of the edge leaving the later-added
+    node (networkx's to_undirected overwrite order).
+
+    Graph g's nodes are either the first n_nodes[g] rows, or those flagged in
+    the boolean node_mask[g] (use this to drop nodes without reordering).
+    Other rows/cols are padding and must be zero; a node whose row and
+    column are both zero still counts as a node.
+    """
+    size = A.shape[1]
+    if node_mask is None:
+        n_nodes = np.asarray(n_nodes)
+        node_mask = np.arange(size)[None, :] < n_nodes[:, None]
+    else:
+        n_nodes = node_mask.sum(axis=1)
+    present = A > 0
+    n_edges = present.sum(axis=(1, 2))
+
+    offdiag = ~np.eye(size, dtype=bool)
+    mutual = present & present.transpose(0, 2, 1) & offdiag
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        density = np.where(
+            (n_nodes >= 2) & (n_edges > 0),
+            n_edges / (n_nodes * (n_nodes - 1.0)),
+            np.nan,
+        )
+        reciprocity = np.where(n_edges > 0, mutual.sum(axis=(1, 2)) / n_edges, np.nan)
+
+    # Undirected weights: for i < j take A[j, i] if present, else A[i, j]
+    upper = np.triu(offdiag)
+    later = A.transpose(0, 2, 1)
+    U_upper = np.where(later > 0, later, A) * upper
+    U = U_upper + U_upper.transpose(0, 2, 1)
+
+    diag = np.diagonal(A, axis1=1, axis2=2)
+    max_w = np.maximum(U.max(axis=(1, 2)), diag.max(axis=1))
+    max_w = np.where(max_w > 0, max_w, 1.0)
+
+    C = np.cbrt(U / max_w[:, None, None])
+    tri = ((C @ C) * C).sum(axis=2)
+    deg = (U > 0).sum(axis=2)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        node_clust = np.where(tri > 0, tri / (deg * (deg - 1.0)), 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        clustering = np.where(
+            (n_nodes >= 3) & (n_edges > 0),
+            (node_clust * node_mask).sum(axis=1) / n_nodes,
+            np.nan,
+        )
+
+    return {
+        "net_n_players": n_nodes,
+        "net_n_edges": n_edges,
+        "net_density": density,
+        "net_clustering": clustering,
+        "net_reciprocity": reciprocity,
+    }
+
+
 def compute_passing_network_metrics(edges: pd.DataFrame) -> pd.DataFrame:
     """
     Given passer->shooter edges, compute simple network cohesion metrics
@@ -77,73 +220,35 @@ def compute_passing_network_metrics(edges: pd.DataFrame) -> pd.DataFrame:
       - net_density: edge density (directed)
       - net_clustering: average clustering (on undirected version)
       - net_reciprocity: fraction of edges that are reciprocated
-    """
-    if edges.empty:
-        return pd.DataFrame(
-            columns=[
-                "season",
-                "season_start_year",
-                "team_id",
-                "game_id",
-                "net_n_players",
-                "net_n_edges",
-                "net_density",
-                "net_clustering",
-                "net_reciprocity",
-            ]
-        )
 
-    records = []
-    group_cols = ["season", "season_start_year", "team_id", "game_id"]
-
-    for key, g in edges.groupby(group_cols):
-        season, season_start_year, team_id, game_id = key
-
-        G = nx.DiGraph()
-
-        for _, row in g.iterrows():
-            passer = row["passer_id"]
-            shooter = row["shooter_id"]
-            weight = row["weight"]
-            if G.has_edge(passer, shooter):
-                G[passer][shooter]["weight"] += weight
-            else:
-                G.add_edge(passer, shooter, weight=weight)
-
-        n_players = G.number_of_nodes()
-        n_edges = G.number_of_edges()
-
-        if n_players >= 2 and n_edges > 0:
-            density = nx.density(G)
-        else:
-            density = np.nan
-
-        if n_players >= 3 and n_edges > 0:
-            # Use undirected version for a simple notion of clustering
-            undirected = G.to_undirected()
-            clustering_vals = nx.clustering(undirected, weight="weight")
-            if clustering_vals:
-                clustering = float(np.mean(list(clustering_vals.values())))
-            else:
-                clustering = np.nan
-        else:
-            clustering = np.nan
-
-        reciprocity = nx.reciprocity(G) if n_edges > 0 else np.nan
-
-        records.append(
-            {
-                "season": season,
-                "season_start_year": season_start_year,
-                "team_id": team_id,
-                "game_id": game_id,
-                "net_n_players": n_players,
-                "net_n_edges": n_edges,
-                "net_density": density,
-                "net_clustering": clustering,
-                "net_reciprocity": reciprocity,
-            }
-        )
+    If edges carry a time_bin column (build_team_passing_edges(time_bin=...))
+    metrics are computed per (season, team, game, time_bin) instead, giving a
+    long-format temporal table.
 
-    return pd.DataFrame.from_records(records)
+    All graphs are scored together as stacked dense adjacency matrices, so
+    adding time bins adds rows to the batch rather than extra passes.
+    """
+    group_cols = GAME_COLS + (["time_bin"] if "time_bin" in edges.columns else [])
 
+    if edges.empty:
+        return pd.DataFrame(columns=group_cols + METRIC_COLS)
+
+    edges, n_nodes = index_graph_nodes(edges, group_cols)
+    keys = edges.drop_duplicates("graph")[group_cols].reset_index(drop=True)
+
+    graph = edges["graph"].to_numpy()
+    src = edges["src"].to_numpy()
+    dst = edges["dst"].to_numpy()
+    weight = edges["weight"].to_numpy(dtype=float)
+
+    parts = []
+    n_graphs = len(n_nodes)
+    for lo in range(0, n_graphs, _CHUNK_GRAPHS):
+        hi = min(lo + _CHUNK_GRAPHS, n_graphs)
+        sel = (graph >= lo) & (graph < hi)
+        size = int(n_nodes[lo:hi].max())
+        A = dense_adjacency(graph[sel] - lo, src[sel], dst[sel], weight[sel], hi - lo, size)
+        parts.append(pd.DataFrame(adjacency_metrics(A, n_nodes[lo:hi])))
+
+    metrics = pd.concat(parts, ignore_index=True)
+    return pd.concat([keys, metrics], axis=1)
@@ -0,0 +1,101 @@
+# network_stability.py
+import math
+
+import numpy as np
+import pandas as pd
+
+from team_games import GAME_COLS, TEAM_SEASON_COLS
+
+
+def compute_network_stability(passing_edges: pd.DataFrame, team_games: pd.DataFrame) -> pd.DataFrame:
+    """
+    Game-to-game stability of each team's passing network.
+
+    Walks every team's schedule once in team_game_index order, keeping only
+    the previous game's edges and the running season total in memory. For
+    each team-game (compared with games earlier in the same season):
+      - jaccard_prev: overlap of directed edge sets with the previous game
+      - cosine_prev: cosine similarity of weighted adjacency with the previous game
+      - cosine_season: cosine similarity with the season-to-date average network
+      - dist_season: Euclidean distance from the season-to-date average network
+    The season norms are updated incrementally (|S + w|^2 = |S|^2 + 2 S.w + |w|^2),
+    so each game costs O(its own edges).
+
+    All four are NaN for a season's first game. After that, cosine_prev /
+    cosine_season are NaN when either network has no edges, and jaccard_prev
+    when neither game has any. A game without edges still gets a finite
+    dist_season (the norm of the season-to-date average), and jaccard_prev
+    0.0 if the previous game had edges.
+    """
+    tg = team_games.sort_values(TEAM_SEASON_COLS + ["team_game_index"]).reset_index(drop=True)
+    row_of = pd.MultiIndex.from_frame(tg[GAME_COLS])
+
+    edge_row = row_of.get_indexer(pd.MultiIndex.from_frame(passing_edges[GAME_COLS]))
+    keep = edge_row >= 0
+    order = np.argsort(edge_row[keep], kind="stable")
+    edge_row = edge_row[keep][order]
+    passer = passing_edges["passer_id"].to_numpy()[keep][order]
+    shooter = passing_edges["shooter_id"].to_numpy()[keep][order]
+    weight = passing_edges["weight"].to_numpy(dtype=float)[keep][order]
+    bounds = np.searchsorted(edge_row, np.arange(len(tg) + 1))
+
+    ts = tg.groupby(TEAM_SEASON_COLS, sort=False).ngroup().to_numpy()
+    new_season = np.r_[True, ts[1:] != ts[:-1]] if len(ts) else np.array([], dtype=bool)
+
+    n = len(tg)
+    jaccard_prev = np.full(n, np.nan)
+    cosine_prev = np.full(n, np.nan)
+    cosine_season = np.full(n, np.nan)
+    dist_season = np.full(n, np.nan)
+
+    prev = {}
+    prev_sq = 0.0
+    season_sum = {}
+    season_sq = 0.0
+    n_prev_games = 0
+
+    for r in range(n):
+        if new_season[r]:
+            prev = {}
+            prev_sq = 0.0
+            season_sum = {}
+            season_sq = 0.0
+            n_prev_games = 0
+
+        lo, hi = bounds[r], bounds[r + 1]
+        cur = dict(zip(zip(passer[lo:hi], shooter[lo:hi]), weight[lo:hi]))
+        cur_sq = sum(w * w for w in cur.values())
+
+        if n_prev_games > 0:
+            union = len(cur.keys() | prev.keys())
+            if union:
+                jaccard_prev[r] = len(cur.keys() & prev.keys()) / union
+
+            if cur_sq > 0 and prev_sq > 0:
+                dot = sum(w * prev.get(k, 0.0) for k, w in cur.items())
+                cosine_prev[r] = dot / math.sqrt(cur_sq * prev_sq)
+
+            dot_season = sum(w * season_sum.get(k, 0.0) for k, w in cur.items())
+            if cur_sq > 0 and season_sq > 0:
+                cosine_season[r] = dot_season / math.sqrt(cur_sq * season_sq)
+
+            # |w - S/n|^2 = |w|^2 - 2 w.S/n + |S|^2/n^2
+            m = n_prev_games
+            dist_season[r] = math.sqrt(max(cur_sq - 2 * dot_season / m + season_sq / (m * m), 0.0))
+        else:
+            dot_season = 0.0
+
+        season_sq += 2 * dot_season + cur_sq
+        for k, w in cur.items():
+            season_sum[k] = season_sum.get(k, 0.0) + w
+        n_prev_games += 1
+        prev = cur
+        prev_sq = cur_sq
+
+    out = tg[GAME_COLS + ["team_game_index"]].copy()
+    out["net_n_edges"] = np.diff(bounds)
+    out["jaccard_prev"] = jaccard_prev
+    out["cosine_prev"] = cosine_prev
+    out["cosine_season"] = cosine_season
+    out["dist_season"] = dist_season
+    return out
@@ -1,6 +1,9 @@
 # outcomes.py
+import numpy as np
 import pandas as pd
 
+from player_events import game_elapsed_seconds
+
 
 def compute_team_outcomes(pbp: pd.DataFrame) -> pd.DataFrame:
     """
@@ -64,3 +67,107 @@ def compute_team_outcomes(pbp: pd.DataFrame) -> pd.DataFrame:
             "win",
         ]
     ]
+
+
+def compute_score_flow_features(pbp: pd.DataFrame) -> pd.DataFrame:
+    """
+    Game-flow features from the running score, for each team in each game.
+
+    Columns (team perspective, margin = own score - opponent score):
+      - lead_changes: times the leading team switched
+      - ties: times the score became level again after tip-off
+      - largest_lead / max_deficit: biggest margin in / against the team's favor
+      - time_leading / time_trailing: seconds spent ahead / behind
+      - comeback: max_deficit if the team won, else 0
+      - margin_q1 .. margin_q4: margin at the end of each regulation quarter
+
+    All games are processed in one pass over the sorted play-by-play using
+    segment-wise (per game) shifts, cumulative and reduce operations.
+    """
+    required_cols = [
+        "season",
+        "season_start_year",
+        "game_id",
+        "AwayTeam",
+        "HomeTeam",
+        "AwayScore",
+        "HomeScore",
+        "Quarter",
+        "SecLeft",
+    ]
+    missing = [c for c in required_cols if c not in pbp.columns]
+    if missing:
+        raise KeyError(f"Missing required columns in pbp: {missing}")
+
+    df = pbp[required_cols].copy()
+    df["_order"] = np.arange(len(df))
+    df = df.sort_values(
+        ["game_id", "Quarter", "SecLeft", "_order"],
+        ascending=[True, True, False, True],
+        kind="mergesort",
+    ).reset_index(drop=True)
+
+    game = df.groupby("game_id", sort=False).ngroup().to_numpy()
+    n_games = game.max() + 1 if len(game) else 0
+    first = np.r_[True, game[1:] != game[:-1]]
+    starts = np.flatnonzero(first)
+    last = np.r_[first[1:], True]
+
+    # Running scores: missing values carry the previous score within the game
+    scores = df[["AwayScore", "HomeScore"]].apply(pd.to_numeric, errors="coerce")
+    scores = scores.groupby(game).ffill().fillna(0)
+    margin = (scores["HomeScore"] - scores["AwayScore"]).to_numpy()
+
+    prev_margin = np.r_[0, margin[:-1]]
+    prev_margin[first] = 0
+
+    ties = np.bincount(game, weights=(margin == 0) & (prev_margin != 0), minlength=n_games)
+
+    sign = np.sign(margin)
+    leader = pd.Series(np.where(sign != 0, sign, np.nan)).groupby(game).ffill().to_numpy()
+    prev_leader = np.r_[np.nan, leader[:-1]]
+    prev_leader[first] = np.nan
+    change = (sign != 0) & ~np.isnan(prev_leader) & (prev_leader != sign)
+    lead_changes = np.bincount(game, weights=change, minlength=n_games)
+
+    # Each score state lasts until the next row (or the end of the game)
+    elapsed = game_elapsed_seconds(df["Quarter"].to_numpy(), df["SecLeft"].to_numpy())
+    game_end = game_elapsed_seconds(np.maximum.reduceat(df["Quarter"].to_numpy(), starts), 0)
+    next_elapsed = np.r_[elapsed[1:], 0]
+    next_elapsed[last] = game_end
+    duration = np.clip(next_elapsed - elapsed, 0, None)
+
+    home_leading = np.bincount(game, weights=duration * (margin > 0), minlength=n_games)
+    away_leading = np.bincount(game, weights=duration * (margin < 0), minlength=n_games)
+
+    home_max = np.maximum(np.maximum.reduceat(margin, starts), 0)
+    away_max = np.maximum(np.maximum.reduceat(-margin, starts), 0)
+    final_margin = margin[last]
+
+    per_game = df.loc[first, ["season", "season_start_year", "game_id", "AwayTeam", "HomeTeam"]].reset_index(drop=True)
+
+    # Margin after the last play of each regulation quarter
+    q_end = pd.DataFrame({"game": game, "Quarter": df["Quarter"].to_numpy(), "margin": margin})
+    q_end = q_end[q_end["Quarter"] <= 4].drop_duplicates(["game", "Quarter"], keep="last")
+    q_margin = q_end.pivot(index="game", columns="Quarter", values="margin").reindex(
+        index=range(n_games), columns=range(1, 5)
+    )
+
+    def team_rows(team_col, sign_, leading, trailing, lead_max, deficit_max):
+        rows = per_game[["season", "season_start_year", "game_id"]].copy()
+        rows["team_id"] = per_game[team_col]
+        rows["lead_changes"] = lead_changes.astype(int)
+        rows["ties"] = ties.astype(int)
+        rows["largest_lead"] = lead_max
+        rows["max_deficit"] = deficit_max
+        rows["time_leading"] = leading
+        rows["time_trailing"] = trailing
+        rows["comeback"] = np.where(sign_ * final_margin > 0, deficit_max, 0)
+        for q in range(1, 5):
+            rows[f"margin_q{q}"] = sign_ * q_margin[q].to_numpy()
+        return rows
+
+    home_rows = team_rows("HomeTeam", 1, home_leading, away_leading, home_max, away_max)
+    away_rows = team_rows("AwayTeam", -1, away_leading, home_leading, away_max, home_max)
+
+    return pd.concat([away_rows, home_rows], ignore_index=True)
@@ -1,53 +1,233 @@
 # pbp_loader.py
+import io
+import os
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from player_events import ACTOR_COLS
+from sampling import attach_sampled_teams, sample_mask
+from text_columns import DEFAULT_STRING_STORAGE, encode_text_columns, has_text, map_unique
+
+# Free-text / raw actor columns that repeat heavily across rows
+TEXT_COLS = ["AwayPlay", "HomePlay"] + ACTOR_COLS
+
+# Columns kept in the per-file game index that picks seasons / sampled games
+INDEX_KEY_COLS = ["URL", "Date", "AwayTeam", "HomeTeam"]
+
+# Cache directory (next to the CSVs) for the per-file game indexes
+GAME_INDEX_DIR = ".pbp_index"
+
 def infer_season_from_date(date_series: pd.Series) -> pd.Series:
     """
     Given a 'Date' column like 'October 27 2015', return season start year, e.g. 2015 for 2015-16.
     """
-    dt = pd.to_datetime(date_series)
-    year = dt.dt.year
-    month = dt.dt.month
+    # Dates repeat for every play of a game: parse each distinct date once
+    codes, uniques = pd.factorize(pd.Series(date_series), use_na_sentinel=False)
+    dt = pd.to_datetime(pd.Series(uniques))
+    year = dt.dt.year.to_numpy()
+    month = dt.dt.month.to_numpy()
     # NBA season starts in Oct; games in Jan–Jun still belong to previous season
     season_start_year = np.where(month >= 10, year, year - 1)
-    return season_start_year.astype(int)
+    return season_start_year.astype(int)[codes]
 
-def load_pbp(path) -> pd.DataFrame:
+def list_pbp_files(path) -> list:
     """
-    Load play-by-play CSV(s) with columns:
-    URL,GameType,Location,Date,Time,WinningTeam,Quarter,SecLeft,AwayTeam,AwayPlay,
-    AwayScore,HomeTeam,HomePlay,HomeScore,... etc.
-
-    - Adds: game_id, season, event_team
-    - Keeps all original columns.
+    CSV files behind `path`: a directory (all *.csv), a single file, or a list of files.
     """
+    if isinstance(path, (list, tuple)):
+        return [Path(p) for p in path]
     path = Path(path)
     if path.is_dir():
         files = sorted(path.glob("*.csv"))
         if not files:
             raise FileNotFoundError(f"No CSV files found in {path}")
-        dfs = [pd.read_csv(f) for f in files]
+        return files
+    return [path]
+
+def scan_seasons(path) -> dict:
+    """
+    Map season_start_year -> list of files containing it, reading only the Date column.
+    """
+    seasons = {}
+    for f in list_pbp_files(path):
+        dates = pd.read_csv(f, usecols=["Date"])["Date"].drop_duplicates()
+        for season in np.unique(infer_season_from_date(dates)):
+            seasons.setdefault(int(season), []).append(f)
+    return seasons
+
+def _build_game_index(data: bytes):
+    """
+    Byte ranges of the runs of consecutive rows belonging to one game.
+
+    Returns a frame with INDEX_KEY_COLS, n_rows, start, end (byte offsets),
+    or None if some record spans several lines (offsets can't be found by
+    newlines alone).
+    """
+    newline = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord("\n"))
+    line_start = np.r_[0, newline + 1]
+    line_start = line_start[line_start < len(data)]
+    line_end = np.r_[line_start[1:], len(data)]
+
+    keys = pd.read_csv(io.BytesIO(data), usecols=INDEX_KEY_COLS)
+    if len(keys) != len(line_start) - 1:
+        return None
+
+    url = keys["URL"].to_numpy()
+    first = np.flatnonzero(np.r_[True, url[1:] != url[:-1]]) if len(url) else np.array([], dtype=int)
+    last = np.r_[first[1:], len(url)] - 1
+    runs = keys.iloc[first].reset_index(drop=True)
+    runs["n_rows"] = last - first + 1
+    # Data row i is line i + 1 (line 0 is the header)
+    runs["start"] = line_start[first + 1]
+    runs["end"] = line_end[last + 1]
+    return runs
+
+def _game_index(f):
+    """
+    _build_game_index for a CSV file, cached in .pbp_index/ next to it and
+    rebuilt whenever the file's size or modification time changes.
+
+    The cache is a plain CSV (nothing executable is loaded from the data
+    directory). It is written to a temporary file and renamed into place, so
+    parallel workers indexing the same file never read a partial cache; an
+    unreadable cache is simply rebuilt.
+    """
+    f = Path(f)
+    stat = f.stat()
+    cache = f.parent / GAME_INDEX_DIR / f"{f.name}.{stat.st_size}.{stat.st_mtime_ns}.csv"
+    if cache.exists():
+        try:
+            runs = pd.read_csv(cache)
+            if set(INDEX_KEY_COLS + ["n_rows", "start", "end"]) <= set(runs.columns):
+                return runs
+        except (OSError, ValueError):
+            pass
+
+    runs = _build_game_index(f.read_bytes())
+    if runs is not None:
+        try:
+            cache.parent.mkdir(exist_ok=True)
+            tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+            runs.to_csv(tmp, index=False)
+            os.replace(tmp, cache)
+            for old in cache.parent.glob(f"{f.name}.*.csv"):
+                if old != cache:
+                    old.unlink(missing_ok=True)
+        except OSError:
+            # Read-only data directory: just don't cache
+            pass
+    return runs
+
+def _read_selected_rows(files, seasons=None, sample_frac=None, sample_seed=0):
+    """
+    Read only the rows of the wanted seasons / sampled games.
+
+    Games are chosen from each file's (cached) game index, and only the
+    byte ranges of the kept games are read and parsed, so dropped games
+    cost nothing after the first run. Files whose records span lines fall
+    back to a full parse.
+
+    Returns (pbp with season_start_year, sampled team table or None).
+    """
+    runs = []
+    for i, f in enumerate(files):
+        r = _game_index(f)
+        if r is None:
+            # Same layout from a full parse: one run per row
+            r = pd.read_csv(f, usecols=INDEX_KEY_COLS)
+            r["n_rows"] = 1
+            r["start"] = r["end"] = -1
+        r["_file"] = i
+        r["_row"] = np.r_[0, np.cumsum(r["n_rows"].to_numpy())[:-1]] if len(r) else []
+        runs.append(r)
+    runs = pd.concat(runs, ignore_index=True)
+    runs["season_start_year"] = infer_season_from_date(runs["Date"])
+    runs["game_id"] = runs["URL"]
+
+    if seasons is not None:
+        runs = runs[runs["season_start_year"].isin(seasons)]
+    teams = None
+    if sample_frac is not None:
+        mask, teams = sample_mask(runs, sample_frac, seed=sample_seed)
+        runs = runs[mask]
+
+    dfs = []
+    for i, f in enumerate(files):
+        r = runs[runs["_file"] == i]
+        if r.empty:
+            continue
+        if (r["start"] < 0).any():
+            rows = np.repeat(r["_row"].to_numpy(), r["n_rows"]) + (
+                np.arange(r["n_rows"].sum()) - np.repeat(np.cumsum(r["n_rows"]) - r["n_rows"], r["n_rows"])
+            )
+            dfs.append(pd.read_csv(f).iloc[rows])
+            continue
+        with open(f, "rb") as fh:
+            parts = [fh.readline()]
+            for start, end in zip(r["start"], r["end"]):
+                fh.seek(start)
+                part = fh.read(end - start)
+                parts.append(part if part.endswith(b"\n") else part + b"\n")
+        dfs.append(pd.read_csv(io.BytesIO(b"".join(parts))))
+
+    if dfs:
         pbp = pd.concat(dfs, ignore_index=True)
     else:
-        pbp = pd.read_csv(path)
+        pbp = pd.read_csv(files[0], nrows=0)
+    pbp["season_start_year"] = np.repeat(runs["season_start_year"].to_numpy(), runs["n_rows"].to_numpy())
+    return pbp, teams
+
+def load_pbp(path, seasons=None, sample_frac=None, sample_seed=0,
+             string_storage=DEFAULT_STRING_STORAGE) -> pd.DataFrame:
+    """
+    Load play-by-play CSV(s) with columns:
+    URL,GameType,Location,Date,Time,WinningTeam,Quarter,SecLeft,AwayTeam,AwayPlay,
+    AwayScore,HomeTeam,HomePlay,HomeScore,... etc.
+
+    `path` may be a directory, a CSV file or a list of CSV files. If `seasons`
+    (season start years) is given, only games from those seasons are kept.
+
+    sample_frac keeps a deterministic ~sample_frac share of games by sampling
+    whole team schedules per season (see sampling.sample_teams); the team
+    table can be recovered with sampling.sampled_teams_of().
+
+    With seasons or sample_frac, the games are chosen from a cached per-file
+    game index and only their rows are read and parsed.
+
+    string_storage sets how TEXT_COLS are held: "object" (default),
+    "category" (codes into a table of unique strings) or "pyarrow"; see
+    text_columns. The pipeline's string parsing runs once per distinct
+    value either way.
+
+    - Adds: game_id, season, event_team
+    - Keeps all original columns.
+    """
+    files = list_pbp_files(path)
+    sampled_teams = None
+    if seasons is None and sample_frac is None:
+        if len(files) > 1:
+            dfs = [pd.read_csv(f) for f in files]
+            pbp = pd.concat(dfs, ignore_index=True)
+        else:
+            pbp = pd.read_csv(files[0])
+        # Infer season from Date
+        pbp["season_start_year"] = infer_season_from_date(pbp["Date"])
+    else:
+        pbp, sampled_teams = _read_selected_rows(files, seasons, sample_frac, sample_seed)
+
+    encode_text_columns(pbp, TEXT_COLS, string_storage)
 
     # Use URL as game_id (it’s unique per game)
     pbp["game_id"] = pbp["URL"]
-
-    # Infer season from Date
-    pbp["season_start_year"] = infer_season_from_date(pbp["Date"])
     # If you want the pretty '2015-16' format:
-    pbp["season"] = (
-        pbp["season_start_year"].astype(str)
-        + "-"
-        + (pbp["season_start_year"] + 1).astype(str).str[-2:]
-    )
+    season_labels = {y: f"{y}-{str(y + 1)[-2:]}" for y in pbp["season_start_year"].unique()}
+    pbp["season"] = pbp["season_start_year"].map(season_labels).astype(object)
 
     # Determine which team generated the play text
-    away_has_play = pbp["AwayPlay"].fillna("").str.strip() != ""
-    home_has_play = pbp["HomePlay"].fillna("").str.strip() != ""
+    away_has_play = map_unique(pbp["AwayPlay"], has_text, na_value=False, dtype=bool)
+    home_has_play = map_unique(pbp["HomePlay"], has_text, na_value=False, dtype=bool)
 
     pbp["event_team"] = pd.Series(pd.NA, index=pbp.index, dtype="object")
 
@@ -63,4 +243,6 @@ def load_pbp(path) -> pd.DataFrame:
     # Optional: sort by game, then by quarter/time (descending seconds left)
     pbp = pbp.sort_values(["season_start_year", "game_id", "Quarter", "SecLeft"], ascending=[True, True, True, False])
 
+    if sampled_teams is not None:
+        attach_sampled_teams(pbp, sampled_teams)
     return pbp
@@ -2,6 +2,40 @@
 import pandas as pd
 import numpy as np
 
+from text_columns import has_text, map_unique
+
+ACTOR_COLS = [
+    "Shooter",
+    "Assister",
+    "Rebounder",
+    "TurnoverPlayer",
+    "FreeThrowShooter",
+    "EnterGame",
+    "LeaveGame",
+]
+
+# Game clock: play-by-play rows give the period (Quarter) and the seconds
+# left in it (SecLeft)
+REGULATION_QUARTER_SEC = 720
+OVERTIME_SEC = 300
+
+def quarter_length(quarter):
+    """Length in seconds of a period (12 min regulation, 5 min overtime)."""
+    return np.where(np.asarray(quarter) <= 4, REGULATION_QUARTER_SEC, OVERTIME_SEC)
+
+def game_elapsed_seconds(quarter, sec_left):
+    """
+    Convert (Quarter, SecLeft) to seconds elapsed since tip-off.
+    """
+    quarter = np.asarray(quarter)
+    sec_left = np.asarray(sec_left)
+    period_start = np.where(
+        quarter <= 4,
+        (quarter - 1) * REGULATION_QUARTER_SEC,
+        4 * REGULATION_QUARTER_SEC + (quarter - 5) * OVERTIME_SEC,
+    )
+    return period_start + quarter_length(quarter) - sec_left
+
 def extract_player_id(raw):
     """
     Extract 'drumman01' from 'A. Drummond - drumman01'.
@@ -25,15 +59,7 @@ def make_player_events(pbp: pd.DataFrame) -> pd.DataFrame:
     """
     pbp = pbp.copy()
 
-    actor_cols = [
-        "Shooter",
-        "Assister",
-        "Rebounder",
-        "TurnoverPlayer",
-        "FreeThrowShooter",
-        "EnterGame",
-        "LeaveGame",
-    ]
+    actor_cols = ACTOR_COLS
 
     use_cols = [
         "season",
@@ -55,9 +81,10 @@ def make_player_events(pbp: pd.DataFrame) -> pd.DataFrame:
     )
 
     # Drop rows with no player
-    long = long[long["raw_player"].notna() & (long["raw_player"].astype(str).str.strip() != "")]
+    long = long[map_unique(long["raw_player"], has_text, na_value=False, dtype=bool)]
 
-    long["player_id"] = long["raw_player"].apply(extract_player_id)
+    # Parse each distinct raw string once, then broadcast back
+    long["player_id"] = map_unique(long["raw_player"], extract_player_id)
     long["team_id"] = long["event_team"]
 
     # Keep just what we need for later
@@ -0,0 +1,236 @@
+# player_movement.py
+import numpy as np
+import pandas as pd
+
+from team_games import TEAM_SEASON_COLS
+
+DEPARTURE_TYPES = ["trade", "absence", "season_end"]
+
+# Bits reserved for the day number in a packed (player, day) lookup key
+_DAY_BITS = 24
+
+
+def _day_number(dates) -> np.ndarray:
+    """Days since the epoch of each date (anything pd.to_datetime accepts)."""
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+class PlayerTeamIndex:
+    """
+    Team affiliation intervals of every player, sorted by (player, start date).
+
+    `intervals` has one row per stint: a maximal run of a player's games
+    (in date order) with the same team in the same season. Lookups pack
+    (player code, day number) into one int64 key and binary-search it, so
+    they never go back to the play-by-play.
+    """
+
+    def __init__(self, intervals: pd.DataFrame):
+        self.intervals = intervals
+        self.players = pd.Index(intervals["player_id"].unique())
+        code = self.players.get_indexer(intervals["player_id"]).astype(np.int64)
+        self._code = code
+        # Day numbers (days since the epoch) of each stint's first/last game
+        self.start_days = _day_number(intervals["start_date"])
+        self.end_days = _day_number(intervals["end_date"])
+        self._key = (code << _DAY_BITS) | self.start_days
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def _locate(self, player_ids, dates, side):
+        code = self.players.get_indexer(pd.Index(np.atleast_1d(player_ids))).astype(np.int64)
+        day = _day_number(np.atleast_1d(dates))
+        code, day = np.broadcast_arrays(code, day)
+        pos = np.searchsorted(self._key, (np.maximum(code, 0) << _DAY_BITS) | day, side=side)
+        return code, day, pos
+
+    def interval_on(self, player_ids, dates, strict: bool = False) -> np.ndarray:
+        """
+        Row of `intervals` for each (player, date), -1 if none.
+
+        By default this is the player's latest stint that started on or
+        before the date (their last known team). With strict=True the date
+        must fall inside the stint, between its first and last game.
+        """
+        code, day, pos = self._locate(player_ids, dates, side="right")
+        row = pos - 1
+        ok = (code >= 0) & (row >= 0)
+        row_c = np.maximum(row, 0)
+        ok &= self._code[row_c] == code
+        if strict:
+            ok &= day <= self.end_days[row_c]
+        return np.where(ok, row, -1)
+
+    def next_interval(self, player_ids, dates) -> np.ndarray:
+        """Row of each player's first stint starting on or after the date, -1 if none."""
+        code, _, pos = self._locate(player_ids, dates, side="left")
+        ok = (code >= 0) & (pos < len(self))
+        pos_c = np.minimum(pos, max(len(self) - 1, 0))
+        ok &= self._code[pos_c] == code if len(self) else False
+        return np.where(ok, pos, -1)
+
+    def team_on(self, player_ids, dates, strict: bool = False) -> np.ndarray:
+        """Team of each (player, date) (see interval_on); None where unknown."""
+        row = self.interval_on(player_ids, dates, strict=strict)
+        teams = self.intervals["team_id"].to_numpy(dtype=object)
+        return np.where(row >= 0, teams[np.maximum(row, 0)] if len(self) else None, None)
+
+    def changes(self) -> pd.DataFrame:
+        """
+        Every team change: consecutive stints of a player with different teams.
+
+        change_type is "mid_season" if both stints are in the same season,
+        otherwise "off_season".
+        """
+        iv = self.intervals
+        nxt = np.flatnonzero(iv["change_type"].isin(["mid_season", "off_season"]).to_numpy())
+        prev = nxt - 1
+        return pd.DataFrame(
+            {
+                "player_id": iv["player_id"].to_numpy()[nxt],
+                "change_type": iv["change_type"].to_numpy()[nxt],
+                "from_team_id": iv["team_id"].to_numpy()[prev],
+                "to_team_id": iv["team_id"].to_numpy()[nxt],
+                "from_season_start_year": iv["season_start_year"].to_numpy()[prev],
+                "to_season_start_year": iv["season_start_year"].to_numpy()[nxt],
+                "last_date_from": iv["end_date"].to_numpy()[prev],
+                "first_date_to": iv["start_date"].to_numpy()[nxt],
+                "last_game_id_from": iv["last_game_id"].to_numpy()[prev],
+                "first_game_id_to": iv["first_game_id"].to_numpy()[nxt],
+            }
+        )
+
+
+def build_player_team_index(events_long: pd.DataFrame) -> PlayerTeamIndex:
+    """
+    Player affiliation intervals from make_player_events output.
+
+    Each player-game is credited to the team with most of that player's
+    events in the game (guards against a stray mis-attributed row). The
+    player-games are sorted by date once and cut wherever the player, team
+    or season changes, all in a single vectorized pass.
+
+    Interval columns:
+      player_id, season, season_start_year, team_id, stint (0-based per player),
+      start_date, end_date, first_game_id, last_game_id, n_games, change_type
+    where change_type says how the stint began: "first" (player's first
+    stint), "mid_season" or "off_season" (new team), or "new_season"
+    (same team, next season).
+    """
+    counts = (
+        events_long.groupby(["player_id", "game_id", "Date"] + TEAM_SEASON_COLS, observed=True)
+        .size()
+        .rename("n")
+        .reset_index()
+    )
+    counts["date"] = pd.to_datetime(counts["Date"])
+
+    # Majority team per player-game, then date order per player
+    pg = (
+        counts.sort_values(["player_id", "game_id", "n", "team_id"], ascending=[True, True, False, True])
+        .drop_duplicates(["player_id", "game_id"])
+        .sort_values(["player_id", "date", "game_id"])
+        .reset_index(drop=True)
+    )
+
+    player = pg["player_id"].to_numpy()
+    team = pg["team_id"].to_numpy()
+    year = pg["season_start_year"].to_numpy()
+
+    new_player = np.r_[True, player[1:] != player[:-1]]
+    new_team = np.r_[True, team[1:] != team[:-1]]
+    new_year = np.r_[True, year[1:] != year[:-1]]
+    starts = np.flatnonzero(new_player | new_team | new_year)
+    ends = np.r_[starts[1:], len(pg)] - 1
+
+    change_type = np.select(
+        [new_player[starts], new_team[starts] & ~new_year[starts], new_team[starts]],
+        ["first", "mid_season", "off_season"],
+        default="new_season",
+    )
+
+    stint_player = player[starts]
+    first_of_player = np.flatnonzero(new_player[starts])
+    stint = np.arange(len(starts)) - np.repeat(first_of_player, np.diff(np.r_[first_of_player, len(starts)]))
+
+    intervals = pd.DataFrame(
+        {
+            "player_id": stint_player,
+            "season": pg["season"].to_numpy()[starts],
+            "season_start_year": year[starts],
+            "team_id": team[starts],
+            "stint": stint,
+            "start_date": pg["date"].to_numpy()[starts],
+            "end_date": pg["date"].to_numpy()[ends],
+            "first_game_id": pg["game_id"].to_numpy()[starts],
+            "last_game_id": pg["game_id"].to_numpy()[ends],
+            "n_games": ends - starts + 1,
+            "change_type": change_type,
+        }
+    )
+    return PlayerTeamIndex(intervals)
+
+
+def classify_departures(departures: pd.DataFrame,
+                        index: PlayerTeamIndex,
+                        team_games: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tag each departure event (detect_departures output) with departure_type:
+      - "trade": the player's stint with the team ended before the first
+        missed game and the player's next stint is with another team in the
+        same season
+      - "season_end": otherwise, if the absence runs to the end of the team's
+        schedule
+      - "absence": anything else (injury, rest, suspension, ...)
+    Adds new_team_id / new_team_first_date for trades.
+    """
+    out = departures.copy()
+    if departures.empty:
+        return out
+
+    tg = team_games[TEAM_SEASON_COLS + ["game_id", "game_date", "team_game_index"]]
+    first_missed = out[TEAM_SEASON_COLS + ["first_missed_game_id"]].merge(
+        tg,
+        left_on=TEAM_SEASON_COLS + ["first_missed_game_id"],
+        right_on=TEAM_SEASON_COLS + ["game_id"],
+        how="left",
+    )
+    n_games = tg.groupby(TEAM_SEASON_COLS).size().rename("n").reset_index()
+    n_games = out[TEAM_SEASON_COLS].merge(n_games, on=TEAM_SEASON_COLS, how="left")["n"].to_numpy()
+
+    player = out["player_id"].to_numpy()
+    date = first_missed["game_date"].to_numpy()
+    iv = index.intervals
+
+    # Stint the player was in just before missing the game, and the next one
+    before = index.interval_on(player, date - np.timedelta64(1, "D"))
+    after = index.next_interval(player, date)
+    end_day = _day_number(date)
+
+    teams = iv["team_id"].to_numpy()
+    years = iv["season_start_year"].to_numpy()
+    team = out["team_id"].to_numpy()
+    before_c = np.maximum(before, 0)
+    # Already playing for someone else by then, or the old stint ended and
+    # the next one is elsewhere
+    moved = (before >= 0) & (teams[before_c] != team)
+    closed = (before >= 0) & (index.end_days[before_c] < end_day)
+    new = np.where(moved, before, np.where(closed, after, -1))
+    new_c = np.maximum(new, 0)
+    trade = (
+        (new >= 0)
+        & (years[new_c] == out["season_start_year"].to_numpy())
+        & (teams[new_c] != team)
+    )
+    to_end = (
+        first_missed["team_game_index"].to_numpy() + out["absence_length"].to_numpy() >= n_games
+    )
+
+    out["departure_type"] = np.select([trade, to_end], ["trade", "season_end"], default="absence")
+    out["new_team_id"] = np.where(trade, teams[new_c], None)
+    out["new_team_first_date"] = pd.Series(
+        np.where(trade, iv["start_date"].to_numpy()[new_c], np.datetime64("NaT")),
+        index=out.index,
+    )
+    return out
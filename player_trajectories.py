@@ -0,0 +1,216 @@
+# player_trajectories.py
+import numpy as np
+import pandas as pd
+
+from team_games import TEAM_SEASON_COLS
+
+TRAJECTORY_COLS = [
+    "game_out_assists",
+    "game_in_assists",
+    "cum_out_degree",
+    "cum_in_degree",
+    "cum_out_share",
+    "cum_pagerank",
+    "cum_betweenness",
+    "roll_out_degree",
+    "roll_in_degree",
+    "roll_pagerank",
+    "roll_betweenness",
+]
+
+# Max team-games per dense block, and per block inside betweenness
+_CHUNK_GAMES = 4000
+_CHUNK_BETWEENNESS = 500
+
+
+def batched_pagerank(W: np.ndarray, active: np.ndarray, damping=0.85, tol=1e-10, max_iter=200):
+    """
+    Weighted PageRank for a stack of adjacency matrices W[g, src, dst].
+
+    Matches networkx.pagerank on the subgraph of active nodes: edges are
+    followed in proportion to their weight and dangling nodes jump uniformly.
+    Inactive (padding) nodes get 0.
+    """
+    n = active.sum(axis=1).astype(float)
+    safe_n = np.where(n > 0, n, 1.0)
+    uniform = active / safe_n[:, None]
+
+    out_w = W.sum(axis=2)
+    P = W / np.where(out_w > 0, out_w, 1.0)[:, :, None]
+    dangling = active & (out_w == 0)
+
+    x = uniform.copy()
+    for _ in range(max_iter):
+        dangling_mass = (x * dangling).sum(axis=1)
+        x_new = damping * (np.einsum("gi,gij->gj", x, P) + dangling_mass[:, None] * uniform)
+        x_new += (1 - damping) * uniform
+        if np.abs(x_new - x).sum(axis=1).max() < tol:
+            x = x_new
+            break
+        x = x_new
+    return x
+
+
+def batched_betweenness(B: np.ndarray, active: np.ndarray) -> np.ndarray:
+    """
+    Normalized betweenness (directed, unweighted hops) for a stack of graphs.
+
+    Shortest-path counts come from boolean matrix powers: the number of walks
+    of length d(s, t) between s and t equals the number of shortest paths.
+    Matches networkx.betweenness_centrality(normalized=True) on active nodes.
+    """
+    G, N, _ = B.shape
+    eye = np.eye(N, dtype=bool)
+    A = ((B > 0) & ~eye).astype(float)
+
+    D = np.full((G, N, N), np.inf)
+    S = np.zeros((G, N, N))
+    D[:, eye] = 0
+    S[:, eye] = 1
+
+    walks = np.broadcast_to(eye, (G, N, N)).astype(float)
+    for k in range(1, N):
+        walks = walks @ A
+        new = (walks > 0) & np.isinf(D)
+        if not new.any():
+            break
+        D[new] = k
+        S[new] = walks[new]
+
+    reach = np.isfinite(D) & ~eye
+    bc = np.zeros((G, N))
+    for v in range(N):
+        via = (D[:, :, v, None] + D[:, None, v, :]) == D
+        via &= reach
+        via[:, v, :] = False
+        via[:, :, v] = False
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = S[:, :, v, None] * S[:, None, v, :] / S
+        bc[:, v] = np.where(via, share, 0.0).sum(axis=(1, 2))
+
+    n = active.sum(axis=1).astype(float)
+    scale = np.where(n > 2, 1.0 / ((n - 1) * (n - 2)), 1.0)
+    return bc * scale[:, None] * active
+
+
+def _graph_metrics(W: np.ndarray, damping: float):
+    out_deg = W.sum(axis=2)
+    in_deg = W.sum(axis=1)
+    active = (out_deg + in_deg) > 0
+
+    pagerank = batched_pagerank(W, active, damping=damping)
+    betweenness = np.zeros_like(out_deg)
+    for lo in range(0, len(W), _CHUNK_BETWEENNESS):
+        hi = lo + _CHUNK_BETWEENNESS
+        betweenness[lo:hi] = batched_betweenness(W[lo:hi], active[lo:hi])
+
+    return active, out_deg, in_deg, pagerank, betweenness
+
+
+def build_player_trajectories(passing_edges: pd.DataFrame,
+                              team_games: pd.DataFrame,
+                              window: int = 10,
+                              damping: float = 0.85) -> pd.DataFrame:
+    """
+    Season-long passing-network trajectory of every player, game by game.
+
+    For each (season, team) the per-game assist adjacency matrices are
+    stacked in team_game_index order and accumulated with a cumulative sum,
+    so the graph after game g is the previous one plus game g's sparse
+    edges; the rolling graph is cum[g] - cum[g - window].
+
+    Returns one row per (team-game, player) for players already in the
+    team's cumulative network, with keys season, season_start_year, team_id,
+    game_id, team_game_index, player_id and the TRAJECTORY_COLS:
+      - game_out_assists / game_in_assists: assists made / received that game
+      - cum_*/roll_*: weighted out/in-degree, PageRank and betweenness of the
+        season-to-date and last-`window`-games graphs
+      - cum_out_share: player's share of the team's season-to-date assists
+    Join with detect_departures output on (season, team_id) to follow
+    teammates around a departure.
+    """
+    tg = team_games.sort_values(TEAM_SEASON_COLS + ["team_game_index"]).reset_index(drop=True)
+    ts = tg.groupby(TEAM_SEASON_COLS, sort=False).ngroup().to_numpy()
+    n_ts = ts.max() + 1 if len(tg) else 0
+    ts_start = np.searchsorted(ts, np.arange(n_ts))
+    row_start = ts_start[ts]
+
+    e = passing_edges.merge(
+        tg[TEAM_SEASON_COLS + ["game_id"]].assign(row=np.arange(len(tg)), ts=ts),
+        on=TEAM_SEASON_COLS + ["game_id"],
+        how="inner",
+    )
+
+    # Local node index of each player within its team-season roster
+    players = pd.concat(
+        [e[["ts", "passer_id"]].set_axis(["ts", "player_id"], axis=1),
+         e[["ts", "shooter_id"]].set_axis(["ts", "player_id"], axis=1)]
+    ).drop_duplicates().sort_values(["ts", "player_id"], kind="mergesort")
+    players["node"] = players.groupby("ts").cumcount()
+    node_of = pd.MultiIndex.from_frame(players[["ts", "player_id"]])
+    node_idx = players["node"].to_numpy()
+    roster_size = np.bincount(players["ts"].to_numpy(), minlength=n_ts)
+
+    src = node_idx[node_of.get_indexer(pd.MultiIndex.from_arrays([e["ts"], e["passer_id"]]))]
+    dst = node_idx[node_of.get_indexer(pd.MultiIndex.from_arrays([e["ts"], e["shooter_id"]]))]
+    e_row = e["row"].to_numpy()
+    weight = e["weight"].to_numpy(dtype=float)
+    player_ids = players.set_index(["ts", "node"])["player_id"]
+
+    parts = []
+    lo_ts = 0
+    while lo_ts < n_ts:
+        # Whole team-seasons per block, about _CHUNK_GAMES team-games each
+        hi_ts = lo_ts + 1
+        while hi_ts < n_ts and ts_start[hi_ts] - ts_start[lo_ts] < _CHUNK_GAMES:
+            hi_ts += 1
+        r_lo = ts_start[lo_ts]
+        r_hi = ts_start[hi_ts] if hi_ts < n_ts else len(tg)
+        N = max(int(roster_size[lo_ts:hi_ts].max()), 1)
+
+        sel = (e_row >= r_lo) & (e_row < r_hi)
+        A = np.zeros((r_hi - r_lo, N, N))
+        np.add.at(A, (e_row[sel] - r_lo, src[sel], dst[sel]), weight[sel])
+
+        # Sparse per-game increments -> running totals, reset at each team-season
+        cum_all = np.cumsum(A, axis=0)
+        zero = np.zeros((1, N, N))
+        padded = np.concatenate([zero, cum_all])
+        base = padded[row_start[r_lo:r_hi] - r_lo]
+        cum = cum_all - base
+
+        rows = np.arange(r_lo, r_hi)
+        back = np.maximum(rows - window, row_start[r_lo:r_hi] - 1)
+        roll = cum_all - padded[back - r_lo + 1]
+
+        c_active, c_out, c_in, c_pr, c_bc = _graph_metrics(cum, damping)
+        _, r_out, r_in, r_pr, r_bc = _graph_metrics(roll, damping)
+
+        g_idx, node = np.nonzero(c_active)
+        row = g_idx + r_lo
+        team_total = c_out.sum(axis=1)
+
+        block = tg.loc[row, TEAM_SEASON_COLS + ["game_id", "team_game_index"]].reset_index(drop=True)
+        block["player_id"] = player_ids.loc[list(zip(ts[row], node))].to_numpy()
+        block["game_out_assists"] = A[g_idx, node, :].sum(axis=1)
+        block["game_in_assists"] = A[g_idx, :, node].sum(axis=1)
+        block["cum_out_degree"] = c_out[g_idx, node]
+        block["cum_in_degree"] = c_in[g_idx, node]
+        block["cum_out_share"] = c_out[g_idx, node] / np.where(team_total[g_idx] > 0, team_total[g_idx], np.nan)
+        block["cum_pagerank"] = c_pr[g_idx, node]
+        block["cum_betweenness"] = c_bc[g_idx, node]
+        block["roll_out_degree"] = r_out[g_idx, node]
+        block["roll_in_degree"] = r_in[g_idx, node]
+        block["roll_pagerank"] = r_pr[g_idx, node]
+        block["roll_betweenness"] = r_bc[g_idx, node]
+        parts.append(block)
+
+        lo_ts = hi_ts
+
+    if not parts:
+        return pd.DataFrame(
+            columns=TEAM_SEASON_COLS + ["game_id", "team_game_index", "player_id"] + TRAJECTORY_COLS
+        )
+
+    out = pd.concat(parts, ignore_index=True)
+    return out.sort_values(TEAM_SEASON_COLS + ["team_game_index", "player_id"]).reset_index(drop=True)
@@ -0,0 +1,221 @@
+# query_server.py
+"""
+Small local HTTP server answering lookups over precomputed pipeline tables.
+
+Run `python master.py export --out-dir artifacts` once, then
+`python master.py serve --artifact-dir artifacts` and query e.g.
+
+  /health
+  /team/BOS/2017                     team_metrics rows for one team-season
+  /team/BOS?from=2015&to=2018        team_metrics rows over a season range
+  /player/jamesle01/departures       departure events for one player
+  /game/<game_id>/network            passing edges + network metrics of one game
+                                     (game ids are URLs: percent-encode the slashes)
+  /event/<event_id>                  event-study panel rows for one departure
+
+Tables are held in memory with sorted indexes, and the artifact files are
+polled so a re-export is picked up without restarting the server.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+ARTIFACT_TABLES = ["team_metrics", "departures", "event_panel", "passing_edges"]
+
+
+def artifact_path(artifact_dir, name) -> Path:
+    return Path(artifact_dir) / f"{name}.csv"
+
+
+def read_artifact(path) -> pd.DataFrame:
+    """An exported table; empty if the file is missing or has no header (no rows exported)."""
+    if not path.exists():
+        return pd.DataFrame()
+    try:
+        return pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return pd.DataFrame()
+
+
+def _indexed(df: pd.DataFrame, cols) -> pd.DataFrame:
+    """Sorted MultiIndex on cols (columns kept) for O(log n) .loc lookups."""
+    if df.empty or not set(cols) <= set(df.columns):
+        return df
+    return df.set_index(cols, drop=False).sort_index()
+
+
+class ArtifactIndex:
+    """
+    In-memory, indexed snapshot of the exported pipeline tables.
+
+    Lookups never touch disk; reload() builds a new snapshot and swaps it in
+    under a lock, so requests see either the old or the new tables.
+    """
+
+    def __init__(self, artifact_dir):
+        self.artifact_dir = Path(artifact_dir)
+        self._lock = threading.Lock()
+        self._mtimes = {}
+        self._tables = {}
+        self.reload()
+
+    def _current_mtimes(self):
+        mtimes = {}
+        for name in ARTIFACT_TABLES:
+            p = artifact_path(self.artifact_dir, name)
+            mtimes[name] = p.stat().st_mtime_ns if p.exists() else None
+        return mtimes
+
+    def reload(self):
+        mtimes = self._current_mtimes()
+        tables = {}
+        for name in ARTIFACT_TABLES:
+            tables[name] = read_artifact(artifact_path(self.artifact_dir, name))
+
+        tables["team_metrics"] = _indexed(tables["team_metrics"], ["team_id", "season_start_year"])
+        tables["team_metrics_by_game"] = _indexed(tables["team_metrics"].reset_index(drop=True), ["game_id"])
+        tables["departures"] = _indexed(tables["departures"], ["player_id"])
+        tables["event_panel"] = _indexed(tables["event_panel"], ["event_id"])
+        tables["passing_edges"] = _indexed(tables["passing_edges"], ["game_id"])
+
+        with self._lock:
+            self._tables = tables
+            self._mtimes = mtimes
+
+    def reload_if_changed(self) -> bool:
+        if self._current_mtimes() != self._mtimes:
+            self.reload()
+            return True
+        return False
+
+    def table(self, name) -> pd.DataFrame:
+        with self._lock:
+            return self._tables[name]
+
+    def row_counts(self):
+        with self._lock:
+            return {name: len(self._tables[name]) for name in ARTIFACT_TABLES}
+
+    # --- Queries -------------------------------------------------------
+    @staticmethod
+    def _lookup(df, key):
+        if df.empty:
+            return df
+        try:
+            out = df.loc[[key] if not isinstance(key, tuple) else key]
+        except KeyError:
+            return df.iloc[0:0]
+        return out if isinstance(out, pd.DataFrame) else out.to_frame().T
+
+    def team_season(self, team_id, season_start_year):
+        return self._lookup(self.table("team_metrics"), (team_id, int(season_start_year)))
+
+    def team_range(self, team_id, season_from=None, season_to=None):
+        df = self.table("team_metrics")
+        if df.empty:
+            return df
+        lo = int(season_from) if season_from is not None else df["season_start_year"].min()
+        hi = int(season_to) if season_to is not None else df["season_start_year"].max()
+        return df.loc[(team_id, lo):(team_id, hi)]
+
+    def player_departures(self, player_id):
+        return self._lookup(self.table("departures"), player_id)
+
+    def game_network(self, game_id):
+        return {
+            "edges": self._lookup(self.table("passing_edges"), game_id),
+            "metrics": self._lookup(self.table("team_metrics_by_game"), game_id),
+        }
+
+    def event_window(self, event_id):
+        return self._lookup(self.table("event_panel"), int(event_id))
+
+
+def _records(df: pd.DataFrame):
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+def make_handler(index: ArtifactIndex):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            try:
+                payload = self._route(parts, query)
+            except ValueError as exc:
+                self._send(400, {"error": str(exc)})
+                return
+
+            if payload is None:
+                self._send(404, {"error": f"Unknown path {url.path}"})
+            else:
+                self._send(200, payload)
+
+        def _route(self, parts, query):
+            if parts == ["health"]:
+                return {"artifact_dir": str(index.artifact_dir), "rows": index.row_counts()}
+            if len(parts) == 3 and parts[0] == "team":
+                return _records(index.team_season(parts[1], parts[2]))
+            if len(parts) == 2 and parts[0] == "team":
+                return _records(index.team_range(parts[1], query.get("from"), query.get("to")))
+            if len(parts) == 3 and parts[0] == "player" and parts[2] == "departures":
+                return _records(index.player_departures(parts[1]))
+            if len(parts) == 3 and parts[0] == "game" and parts[2] == "network":
+                net = index.game_network(parts[1])
+                return {k: _records(v) for k, v in net.items()}
+            if len(parts) == 2 and parts[0] == "event":
+                return _records(index.event_window(parts[1]))
+            return None
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def _watch(index: ArtifactIndex, poll_seconds: float, stop: threading.Event):
+    while not stop.wait(poll_seconds):
+        try:
+            if index.reload_if_changed():
+                print(f"Reloaded artifacts from {index.artifact_dir}")
+        except Exception as exc:
+            # Keep serving the previous snapshot and retry on the next poll
+            print(f"Reloading artifacts from {index.artifact_dir} failed: {exc!r}")
+
+
+def serve(artifact_dir, host="127.0.0.1", port=8608, poll_seconds=2.0):
+    """
+    Serve lookups over the artifacts in artifact_dir until interrupted.
+    """
+    start = time.perf_counter()
+    index = ArtifactIndex(artifact_dir)
+    print(f"Loaded {index.row_counts()} in {time.perf_counter() - start:.2f}s")
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=_watch, args=(index, poll_seconds, stop), daemon=True)
+    watcher.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(index))
+    print(f"Serving on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
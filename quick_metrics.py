@@ -1,6 +1,13 @@
 # quick_metrics.py
 import pandas as pd
 
+from text_columns import map_unique
+
+
+def _is_assist(play) -> bool:
+    return "assist by" in str(play)
+
+
 def compute_team_assists_per_game(pbp: pd.DataFrame) -> pd.DataFrame:
     """
     Simple example metric: number of assists recorded by each team in each game.
@@ -10,9 +17,9 @@ def compute_team_assists_per_game(pbp: pd.DataFrame) -> pd.DataFrame:
     """
     pbp = pbp.copy()
 
-    # Assist events: text contains "(assist by"
-    away_assist_mask = pbp["AwayPlay"].fillna("").str.contains("assist by")
-    home_assist_mask = pbp["HomePlay"].fillna("").str.contains("assist by")
+    # Assist events: text contains "(assist by" (checked once per distinct play text)
+    away_assist_mask = map_unique(pbp["AwayPlay"], _is_assist, na_value=False, dtype=bool)
+    home_assist_mask = map_unique(pbp["HomePlay"], _is_assist, na_value=False, dtype=bool)
 
     away_assists = (
         pbp[away_assist_mask]
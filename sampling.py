@@ -0,0 +1,196 @@
+# sampling.py
+import numpy as np
+import pandas as pd
+
+# Sampling unit: a team's season schedule. Keyed on season_start_year only
+# (not the "season" label) since games are sampled from the raw key columns,
+# before the loader adds labels.
+SAMPLE_UNIT_COLS = ["season_start_year", "team_id"]
+
+ESTIMATE_METRICS = [
+    "assists",
+    "net_n_players",
+    "net_density",
+    "net_clustering",
+    "net_reciprocity",
+    "point_diff",
+]
+
+
+def _unit_hash(values: pd.Series) -> np.ndarray:
+    """Deterministic (not per-process salted) hash of each value, mapped to [0, 1)."""
+    h = pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+    return h / float(2 ** 64)
+
+
+def sample_teams(pbp: pd.DataFrame, frac: float, seed: int = 0) -> pd.DataFrame:
+    """
+    Pick whole team schedules, stratified by season.
+
+    Each (season, team) gets a hash of seed/season/team; within every season
+    the teams with the smallest hashes are kept. Since a game involves two
+    teams, keeping ceil(frac * n_teams / 2) teams (at least one) keeps
+    roughly `frac` of the games; rounding up makes the choice monotone in
+    frac (a larger frac never keeps fewer teams).
+
+    pbp needs season_start_year, game_id, AwayTeam and HomeTeam (the key
+    columns are enough). Returns one row per (season_start_year, team_id)
+    with n_teams_season, a boolean `sampled`, and the season's total and
+    kept game counts (n_games_season, n_games_kept_season).
+    """
+    if not 0 < frac <= 1:
+        raise ValueError(f"sample frac must be in (0, 1], got {frac!r}")
+
+    teams = pd.concat(
+        [
+            pbp[["season_start_year", "AwayTeam"]].set_axis(SAMPLE_UNIT_COLS, axis=1),
+            pbp[["season_start_year", "HomeTeam"]].set_axis(SAMPLE_UNIT_COLS, axis=1),
+        ]
+    ).drop_duplicates().reset_index(drop=True)
+
+    teams["u"] = _unit_hash(
+        str(seed) + ":" + teams["season_start_year"].astype(str) + ":" + teams["team_id"].astype(str)
+    )
+    teams["n_teams_season"] = teams.groupby("season_start_year")["team_id"].transform("size")
+    rank = teams.groupby("season_start_year")["u"].rank(method="first")
+    # Small tolerance so e.g. 0.2 * 10 / 2 (= 1.0000000000000002) stays 1
+    n_keep = np.maximum(1, np.ceil(frac * teams["n_teams_season"] / 2 - 1e-9)).astype(int)
+    if frac == 1:
+        n_keep = teams["n_teams_season"]
+    teams["sampled"] = rank <= n_keep
+
+    games = pbp[["season_start_year", "game_id", "AwayTeam", "HomeTeam"]].drop_duplicates("game_id")
+    games = games.assign(kept=_in_sample(games, teams))
+    per_season = games.groupby("season_start_year")["kept"].agg(["size", "sum"])
+    teams["n_games_season"] = teams["season_start_year"].map(per_season["size"]).astype(int)
+    teams["n_games_kept_season"] = teams["season_start_year"].map(per_season["sum"]).astype(int)
+
+    return teams.drop(columns="u").sort_values(SAMPLE_UNIT_COLS).reset_index(drop=True)
+
+
+def _in_sample(pbp: pd.DataFrame, teams: pd.DataFrame) -> np.ndarray:
+    """Rows of pbp whose away or home team-season was sampled."""
+    keys = pd.MultiIndex.from_frame(teams.loc[teams["sampled"], SAMPLE_UNIT_COLS])
+    away = pd.MultiIndex.from_arrays([pbp["season_start_year"], pbp["AwayTeam"]]).isin(keys)
+    home = pd.MultiIndex.from_arrays([pbp["season_start_year"], pbp["HomeTeam"]]).isin(keys)
+    return away | home
+
+
+def sample_mask(pbp: pd.DataFrame, frac: float, seed: int = 0):
+    """
+    (row mask, team table) for sampling pbp; see sample_teams.
+
+    Works on just the key columns, so a loader can choose rows before
+    parsing the rest of the file.
+    """
+    teams = sample_teams(pbp, frac, seed)
+    return _in_sample(pbp, teams), teams
+
+
+def sample_games(pbp: pd.DataFrame, frac: float, seed: int = 0) -> pd.DataFrame:
+    """
+    Keep every game played by a sampled team (see sample_teams).
+
+    Sampled teams keep their full, contiguous schedule, so team_game_index and
+    departure detection stay exact for them. The team table is kept in the
+    returned frame's attrs; get it back with sampled_teams_of().
+    """
+    mask, teams = sample_mask(pbp, frac, seed)
+    out = pbp[mask].reset_index(drop=True)
+    attach_sampled_teams(out, teams)
+    return out
+
+
+def attach_sampled_teams(pbp: pd.DataFrame, teams: pd.DataFrame):
+    # Plain lists: attrs are copied/compared by pandas on every derived frame
+    pbp.attrs["sampled_teams"] = teams.to_dict("list")
+
+
+def achieved_game_frac(sampled_teams: pd.DataFrame) -> float:
+    """Share of games actually kept by a sample, over all its seasons."""
+    per_season = sampled_teams.drop_duplicates("season_start_year")
+    total = per_season["n_games_season"].sum()
+    return float(per_season["n_games_kept_season"].sum() / total) if total else float("nan")
+
+
+def sampled_teams_of(pbp: pd.DataFrame):
+    """Team table of a frame made by sample_games, or None if it wasn't sampled."""
+    teams = pbp.attrs.get("sampled_teams")
+    return None if teams is None else pd.DataFrame(teams)
+
+
+def restrict_to_sample(tables: dict, sampled_teams: pd.DataFrame) -> dict:
+    """
+    Drop rows of opponents that are only partly observed in a sampled run.
+
+    Filters every table with season_start_year/team_id columns to the
+    sampled team-seasons and renumbers departure event_ids.
+    """
+    keys = pd.MultiIndex.from_frame(sampled_teams.loc[sampled_teams["sampled"], SAMPLE_UNIT_COLS])
+    out = {}
+    for name, df in tables.items():
+        if set(SAMPLE_UNIT_COLS) <= set(df.columns):
+            mask = pd.MultiIndex.from_frame(df[SAMPLE_UNIT_COLS]).isin(keys)
+            df = df[mask].reset_index(drop=True)
+        out[name] = df
+
+    departures = out.get("departures")
+    if departures is not None and not departures.empty:
+        departures["event_id"] = range(len(departures))
+    out["sampled_teams"] = sampled_teams
+    return out
+
+
+def estimate_from_sample(team_metrics: pd.DataFrame,
+                         departures: pd.DataFrame,
+                         sampled_teams: pd.DataFrame,
+                         metrics=None,
+                         z: float = 1.96) -> pd.DataFrame:
+    """
+    Population estimates with standard errors from a team-sampled run.
+
+    Team-seasons are the sampling clusters. Per-game metric means use the
+    ratio estimator sum(y) / sum(games) with its linearized variance; the
+    number of departures is scaled up by the inverse sampling fraction.
+    Both include the finite population correction, so a full run has SE 0.
+    """
+    metrics = [m for m in (metrics or ESTIMATE_METRICS) if m in team_metrics.columns]
+
+    n_clusters = int(sampled_teams["sampled"].sum())
+    N_clusters = len(sampled_teams)
+    f = n_clusters / N_clusters
+    fpc = 1 - f
+
+    rows = []
+    for metric in metrics:
+        clean = team_metrics.dropna(subset=[metric])
+        per = clean.groupby(SAMPLE_UNIT_COLS)[metric].agg(["sum", "count"])
+        n = len(per)
+        if n == 0:
+            continue
+        r = per["sum"].sum() / per["count"].sum()
+        if n > 1:
+            resid = per["sum"] - r * per["count"]
+            var = fpc * (resid ** 2).sum() / (n * (n - 1) * per["count"].mean() ** 2)
+        else:
+            var = np.nan
+        se = np.sqrt(var)
+        rows.append({"metric": metric, "estimate": r, "std_error": se})
+
+    sampled = sampled_teams.loc[sampled_teams["sampled"], SAMPLE_UNIT_COLS]
+    if departures.empty:
+        per_cluster = pd.Series(0.0, index=range(len(sampled)))
+    else:
+        counts = departures.groupby(SAMPLE_UNIT_COLS).size().rename("n").reset_index()
+        per_cluster = sampled.merge(counts, on=SAMPLE_UNIT_COLS, how="left")["n"].fillna(0)
+    if n_clusters > 0:
+        total = N_clusters * per_cluster.mean()
+        se = N_clusters * np.sqrt(fpc * per_cluster.var(ddof=1) / n_clusters) if n_clusters > 1 else np.nan
+        rows.append({"metric": "n_departures", "estimate": total, "std_error": se})
+
+    est = pd.DataFrame(rows, columns=["metric", "estimate", "std_error"])
+    est["ci_low"] = est["estimate"] - z * est["std_error"]
+    est["ci_high"] = est["estimate"] + z * est["std_error"]
+    est["n_clusters"] = n_clusters
+    est["sample_frac_clusters"] = f
+    return est
@@ -0,0 +1,183 @@
+# star_availability.py
+import numpy as np
+import pandas as pd
+
+from team_games import TEAM_SEASON_COLS
+
+STAR_KEYS = TEAM_SEASON_COLS + ["player_id"]
+
+# Value used past the end of a team's schedule so runs never cross rows
+_PAD = 2
+
+
+class StarAvailability:
+    """
+    Played/missed flags of every star-season as packed bits.
+
+    Row i of `bits` belongs to stars.iloc[i]; bit j (numpy packbits order) is
+    1 if the star appeared in team game j (team_game_index). Positions past
+    n_games[i] are unused. game_ids[team_row[i], j] gives the game id.
+    """
+
+    def __init__(self, stars, bits, n_games, team_row, game_ids):
+        self.stars = stars
+        self.bits = bits
+        self.n_games = n_games
+        self.team_row = team_row
+        self.game_ids = game_ids
+
+    def __len__(self):
+        return len(self.stars)
+
+    @property
+    def max_games(self) -> int:
+        return self.game_ids.shape[1]
+
+    def played_matrix(self) -> np.ndarray:
+        """Unpacked (n_stars, max_games) boolean played matrix."""
+        return np.unpackbits(self.bits, axis=1, count=self.max_games).astype(bool)
+
+    def valid_mask(self) -> np.ndarray:
+        return np.arange(self.max_games)[None, :] < self.n_games[:, None]
+
+    def games_played(self) -> np.ndarray:
+        """Number of games played by each star-season."""
+        return np.bitwise_count(self.bits).sum(axis=1).astype(int)
+
+    def window_counts(self, start, stop) -> np.ndarray:
+        """
+        Games played by each star in team games [start, stop).
+        start/stop may be scalars or one value per star.
+        """
+        played = self.played_matrix()
+        cum = np.concatenate([np.zeros((len(self), 1), dtype=int), played.cumsum(axis=1)], axis=1)
+        rows = np.arange(len(self))
+        start = np.clip(np.broadcast_to(start, rows.shape), 0, self.max_games)
+        stop = np.clip(np.broadcast_to(stop, rows.shape), 0, self.max_games)
+        return np.maximum(cum[rows, stop] - cum[rows, start], 0)
+
+    def runs(self) -> pd.DataFrame:
+        """
+        Every maximal played/missed run of every star-season.
+
+        Returns star_row, played (bool), start (team_game_index), length.
+        """
+        values = np.where(self.valid_mask(), self.played_matrix(), _PAD).astype(np.int8)
+        # A trailing pad column guarantees a boundary at the end of every row
+        values = np.concatenate([values, np.full((len(self), 1), _PAD, dtype=np.int8)], axis=1)
+        flat = values.ravel()
+
+        boundary = np.r_[True, flat[1:] != flat[:-1]]
+        starts = np.flatnonzero(boundary)
+        lengths = np.diff(np.r_[starts, len(flat)])
+        kind = flat[starts]
+
+        width = values.shape[1]
+        keep = kind != _PAD
+        return pd.DataFrame(
+            {
+                "star_row": starts[keep] // width,
+                "played": kind[keep] == 1,
+                "start": starts[keep] % width,
+                "length": lengths[keep],
+            }
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Long form identical to build_star_games: one row per star x team game
+        with team_game_index, game_id and played (0/1).
+        """
+        row, idx = np.nonzero(self.valid_mask())
+        out = self.stars.iloc[row][STAR_KEYS].reset_index(drop=True)
+        out["game_id"] = self.game_ids[self.team_row[row], idx]
+        out["team_game_index"] = idx
+        out["played"] = self.played_matrix()[row, idx].astype(int)
+        return out[STAR_KEYS + ["game_id", "team_game_index", "played"]]
+
+
+def build_star_availability(team_games: pd.DataFrame,
+                            appearances: pd.DataFrame,
+                            stars: pd.DataFrame) -> StarAvailability:
+    """
+    Packed-bit alternative to build_star_games.
+
+    Sets one bit per star appearance straight from build_player_game_appearances
+    output, without expanding every star to every team game.
+    """
+    star_keys = (
+        stars[stars["is_star"]][STAR_KEYS]
+        .drop_duplicates()
+        .sort_values(STAR_KEYS)
+        .reset_index(drop=True)
+    )
+
+    # Team-season schedule: game ids by team_game_index
+    tg = team_games.sort_values(TEAM_SEASON_COLS + ["team_game_index"]).reset_index(drop=True)
+    ts = tg.groupby(TEAM_SEASON_COLS, sort=False).ngroup().to_numpy()
+    ts_keys = tg.drop_duplicates(TEAM_SEASON_COLS)[TEAM_SEASON_COLS].reset_index(drop=True)
+    n_games_ts = np.bincount(ts, minlength=len(ts_keys))
+    max_games = int(n_games_ts.max()) if len(n_games_ts) else 0
+
+    game_ids = np.full((len(ts_keys), max_games), None, dtype=object)
+    game_ids[ts, tg["team_game_index"].to_numpy()] = tg["game_id"].to_numpy()
+
+    ts_index = pd.MultiIndex.from_frame(ts_keys)
+    team_row = ts_index.get_indexer(pd.MultiIndex.from_frame(star_keys[TEAM_SEASON_COLS]))
+    has_schedule = team_row >= 0
+    star_keys = star_keys[has_schedule].reset_index(drop=True)
+    team_row = team_row[has_schedule]
+    n_games = n_games_ts[team_row]
+
+    # Appearances of stars, located as (star row, team_game_index)
+    star_index = pd.MultiIndex.from_frame(star_keys)
+    app = appearances[STAR_KEYS + ["game_id"]].drop_duplicates()
+    row = star_index.get_indexer(pd.MultiIndex.from_frame(app[STAR_KEYS]))
+    app = app[row >= 0]
+    row = row[row >= 0]
+    idx = app[TEAM_SEASON_COLS + ["game_id"]].merge(
+        tg[TEAM_SEASON_COLS + ["game_id", "team_game_index"]],
+        on=TEAM_SEASON_COLS + ["game_id"],
+        how="left",
+    )["team_game_index"].to_numpy()
+    found = ~pd.isna(idx)
+    row = row[found]
+    idx = idx[found].astype(int)
+
+    bits = np.zeros((len(star_keys), (max_games + 7) // 8), dtype=np.uint8)
+    np.bitwise_or.at(bits, (row, idx >> 3), (128 >> (idx & 7)).astype(np.uint8))
+
+    return StarAvailability(star_keys, bits, n_games, team_row, game_ids)
+
+
+def detect_departures_from_availability(avail: StarAvailability,
+                                        min_pre_run: int = 5,
+                                        min_absence: int = 3) -> pd.DataFrame:
+    """
+    Same events as detect_departures, found with vectorized run detection.
+
+    A departure is a played run of >= min_pre_run games immediately followed
+    by >= min_absence missed games.
+    """
+    runs = avail.runs()
+    star = runs["star_row"].to_numpy()
+    played = runs["played"].to_numpy()
+    length = runs["length"].to_numpy()
+
+    # Length of the missed run right after each run (0 if none)
+    follows = np.r_[(star[1:] == star[:-1]) & ~played[1:], False]
+    absence_len = np.where(follows, np.r_[length[1:], 0], 0)
+
+    hit = played & (length >= min_pre_run) & (absence_len >= min_absence)
+    if not hit.any():
+        return pd.DataFrame()
+
+    star_row = star[hit]
+    first_missed = runs["start"].to_numpy()[hit] + length[hit]
+
+    events = avail.stars.iloc[star_row][STAR_KEYS].reset_index(drop=True)
+    events["first_missed_game_id"] = avail.game_ids[avail.team_row[star_row], first_missed]
+    events["absence_length"] = absence_len[hit]
+    events["pre_run_length"] = length[hit]
+    events["event_id"] = range(len(events))
+    return events
@@ -23,10 +23,9 @@ def flag_team_stars(usage: pd.DataFrame, star_quantile: float = 0.9) -> pd.DataF
     """
     usage = usage.copy()
 
-    def mark_stars(group):
-        q = group["event_count"].quantile(star_quantile)
-        group["is_star"] = group["event_count"] >= q
-        return group
-
-    usage = usage.groupby(["season", "season_start_year", "team_id"], group_keys=False).apply(mark_stars)
+    # Per-team threshold via grouped quantile (same linear interpolation as Series.quantile)
+    q = usage.groupby(["season", "season_start_year", "team_id"])["event_count"].transform(
+        "quantile", star_quantile
+    )
+    usage["is_star"] = usage["event_count"] >= q
     return usage
@@ -1,6 +1,11 @@
 # team_games.py
 import pandas as pd
 
+# Key columns shared by the pipeline's team-season and team-game tables
+SEASON_COLS = ["season", "season_start_year"]
+TEAM_SEASON_COLS = SEASON_COLS + ["team_id"]
+GAME_COLS = TEAM_SEASON_COLS + ["game_id"]
+
 def build_team_games(pbp: pd.DataFrame) -> pd.DataFrame:
     """
     One row per (season, team_id, game_id) with a chronological index (team_game_index).
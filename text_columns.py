@@ -0,0 +1,62 @@
+# text_columns.py
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# "object": plain Python strings (pandas default)
+# "category": dictionary-encoded, integer codes into a table of unique values
+# "pyarrow": Arrow-backed strings (needs the optional pyarrow package)
+STRING_STORAGES = ["object", "category", "pyarrow"]
+
+DEFAULT_STRING_STORAGE = "object"
+
+
+def pyarrow_available() -> bool:
+    # find_spec avoids paying pyarrow's import time just to check
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def available_string_storages() -> list:
+    """STRING_STORAGES usable in this environment."""
+    return [s for s in STRING_STORAGES if s != "pyarrow" or pyarrow_available()]
+
+
+def encode_text_columns(pbp: pd.DataFrame, columns, storage: str = DEFAULT_STRING_STORAGE) -> pd.DataFrame:
+    """Store the given string columns of pbp (in place) with the given storage."""
+    if storage not in STRING_STORAGES:
+        raise ValueError(f"string storage must be one of {STRING_STORAGES}, got {storage!r}")
+    if storage == "pyarrow" and not pyarrow_available():
+        raise ValueError("string storage 'pyarrow' needs the pyarrow package (pip install pyarrow)")
+    if storage == "object":
+        return pbp
+
+    dtype = "category" if storage == "category" else "string[pyarrow]"
+    for col in columns:
+        if col in pbp.columns:
+            pbp[col] = pbp[col].astype(dtype)
+    return pbp
+
+
+def has_text(value) -> bool:
+    """True for a value that is not blank once converted to a string."""
+    return str(value).strip() != ""
+
+
+def map_unique(values: pd.Series, func, na_value=np.nan, dtype=object) -> np.ndarray:
+    """
+    func applied to every value of a string column, evaluated once per
+    distinct value and broadcast back through integer codes.
+
+    Categorical columns reuse their categories/codes; other storages are
+    factorized first (a single hashed pass). Missing values map to na_value.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+        uniques = values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+
+    # Code -1 (missing) picks the trailing na_value
+    table = np.array([func(u) for u in uniques] + [na_value], dtype=dtype)
+    return table[codes]
@@ -1,6 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns 
+
+from viz_utils import draw_scatter_regression
 
 
 # ------------------------------------------------------------
@@ -46,7 +47,9 @@ def plot_rq1_scatter_relations(team_metrics: pd.DataFrame):
     """
     Scatter + regression plots:
       network metric vs point differential.
-    This function remains unchanged and does not rely on rel_game.
+
+    The regression line and band are fitted analytically, and large
+    samples are drawn as hexbin densities (see draw_scatter_regression).
     """
 
     df = team_metrics.dropna(
@@ -63,7 +66,7 @@ def plot_rq1_scatter_relations(team_metrics: pd.DataFrame):
 
     for i, (metric, label) in enumerate(metrics):
         plt.subplot(1, 3, i + 1)
-        sns.regplot(data=df, x=metric, y="point_diff", scatter_kws={"s": 40})
+        draw_scatter_regression(df, x=metric, y="point_diff")
         plt.title(f"{label} vs Point Differential")
         plt.xlabel(label)
         plt.ylabel("Point Differential")
@@ -17,18 +17,32 @@ from sklearn.pipeline import Pipeline
 # It is meant only to visualize which cohesion metrics are predictive.
 # ------------------------------------------------------------
 
-def _fit_logit(df: pd.DataFrame):
+DEFAULT_FEATURES = ["net_density", "net_clustering", "net_reciprocity"]
+
+# Own network + differential vs. opponent + pre-game opponent strength
+# (columns added by matchups.build_matchup_features)
+MATCHUP_FEATURES = DEFAULT_FEATURES + [
+    "diff_net_density",
+    "diff_net_clustering",
+    "diff_net_reciprocity",
+    "diff_assists",
+    "opp_pre_win_pct",
+    "opp_pre_point_diff",
+]
+
+
+def _fit_logit(df: pd.DataFrame, features=None):
     """
     Fit a basic logistic regression:
       win ~ net_density + net_clustering + net_reciprocity
+    or win ~ <features> if a feature list is given (e.g. MATCHUP_FEATURES).
 
     Returns fitted model and the list of feature names.
     """
-    clean = df.dropna(
-        subset=["win", "net_density", "net_clustering", "net_reciprocity"]
-    ).copy()
+    features = list(features or DEFAULT_FEATURES)
+    clean = df.dropna(subset=["win"] + features).copy()
 
-    X = clean[["net_density", "net_clustering", "net_reciprocity"]]
+    X = clean[features]
     y = clean["win"]
 
     model = Pipeline(
@@ -40,17 +54,17 @@ def _fit_logit(df: pd.DataFrame):
 
     model.fit(X, y)
 
-    feature_names = ["net_density", "net_clustering", "net_reciprocity"]
+    feature_names = features
     coefs = model.named_steps["logit"].coef_[0]
 
     return feature_names, coefs
 
 
-def plot_rq3_logit_coefficients(team_metrics: pd.DataFrame):
+def plot_rq3_logit_coefficients(team_metrics: pd.DataFrame, features=None):
     """
     Plot logistic regression coefficients for predicting win.
     """
-    feat, coef = _fit_logit(team_metrics)
+    feat, coef = _fit_logit(team_metrics, features)
 
     plt.figure(figsize=(7, 5))
     sns.barplot(x=coef, y=feat, orient="h")
@@ -62,11 +76,11 @@ def plot_rq3_logit_coefficients(team_metrics: pd.DataFrame):
     plt.show()
 
 
-def plot_rq3_feature_importance(team_metrics: pd.DataFrame):
+def plot_rq3_feature_importance(team_metrics: pd.DataFrame, features=None):
     """
     Simple importance = |standardized coefficient|.
     """
-    feat, coef = _fit_logit(team_metrics)
+    feat, coef = _fit_logit(team_metrics, features)
     importance = [abs(x) for x in coef]
 
     plt.figure(figsize=(7, 5))
@@ -72,9 +72,91 @@ def facet_metrics(df, metrics, titles=None, ylabel="Metric value"):
 # ---------------------------------------------------------------------
 # 4. Scatter + regression line for cross-sectional relations (RQ1)
 # ---------------------------------------------------------------------
+def ols_fit_band(x, y, n_grid=100, z=1.96):
+    """
+    Closed-form simple OLS fit of y on x with a confidence band for the mean.
+
+    Replaces seaborn's bootstrapped band: one vectorized pass over the data.
+    Returns (grid, fit, ci_low, ci_high), or None if the fit is undefined.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n < 3:
+        return None
+
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    sxx = np.dot(dx, dx)
+    if sxx == 0:
+        return None
+
+    slope = np.dot(dx, y - y_mean) / sxx
+    intercept = y_mean - slope * x_mean
+    resid = y - (intercept + slope * x)
+    s2 = np.dot(resid, resid) / (n - 2)
+
+    grid = np.linspace(x.min(), x.max(), n_grid)
+    fit = intercept + slope * grid
+    se = np.sqrt(s2 * (1.0 / n + (grid - x_mean) ** 2 / sxx))
+
+    return grid, fit, fit - z * se, fit + z * se
+
+
+def binned_means(x, y, bins=20):
+    """
+    Mean of y within equal-width bins of x (empty bins dropped).
+
+    Returns (bin_centers, means).
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.histogram_bin_edges(x, bins=bins)
+    idx = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, len(edges) - 2)
+
+    counts = np.bincount(idx, minlength=len(edges) - 1)
+    sums = np.bincount(idx, weights=y, minlength=len(edges) - 1)
+    keep = counts > 0
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    return centers[keep], sums[keep] / counts[keep]
+
+
+def draw_scatter_regression(df, x, y, ax=None, max_points=5000, gridsize=40, bins=20):
+    """
+    Draw y vs x with an analytic OLS line + 95% band on the given axes.
+
+    Up to max_points rows are drawn as markers; beyond that the points are
+    rendered as a hexbin density with binned means overlaid, which stays
+    fast for the ~17k team-games of the full dataset.
+    """
+    if ax is None:
+        ax = plt.gca()
+
+    clean = df[[x, y]].dropna()
+    xv = clean[x].to_numpy(dtype=float)
+    yv = clean[y].to_numpy(dtype=float)
+
+    if len(xv) > max_points:
+        ax.hexbin(xv, yv, gridsize=gridsize, cmap="Blues", mincnt=1)
+        centers, means = binned_means(xv, yv, bins=bins)
+        ax.plot(centers, means, "o", color="black", markersize=4, label="Binned mean")
+    else:
+        ax.scatter(xv, yv, s=40, alpha=0.6)
+
+    band = ols_fit_band(xv, yv)
+    if band is not None:
+        grid, fit, low, high = band
+        ax.plot(grid, fit, color="red", label="OLS fit")
+        ax.fill_between(grid, low, high, color="red", alpha=0.2)
+
+    return ax
+
+
 def scatter_with_regression(df, x, y, title=None, xlabel=None, ylabel=None):
     plt.figure(figsize=(7, 5))
-    sns.regplot(data=df, x=x, y=y, scatter_kws={"s": 40}, line_kws={"color": "red"})
+    draw_scatter_regression(df, x, y)
     if title:
         plt.title(title)
     if xlabel: